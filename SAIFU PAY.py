@@ -1,37 +1,2380 @@
+import time
+STARTUP_T0 = time.perf_counter()
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QLabel, QLineEdit,
-    QPushButton, QTabWidget, QTableWidget, QTableWidgetItem, QMessageBox,
-    QComboBox, QHeaderView, QHBoxLayout, QFormLayout, QDateEdit, QTimeEdit
+    QPushButton, QTabWidget, QTableView, QAbstractItemView, QMessageBox,
+    QComboBox, QHeaderView, QHBoxLayout, QFormLayout, QDateEdit, QTimeEdit, QProgressBar
 )
 from PyQt5.QtGui import QFont, QColor, QBrush, QIcon
-from PyQt5.QtCore import Qt, QDate, QTime, QDateTime
+from PyQt5.QtCore import (
+    Qt, QDate, QTime, QDateTime, QAbstractTableModel, QModelIndex, QVariant,
+    QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher, pyqtSignal
+)
 import sys
+import bisect
+import contextlib
 import csv
+import io
+import json
+import locale
+import mmap
+import multiprocessing
+import re
+from collections import OrderedDict
 import os
+import random
+import shutil
+import sqlite3
+import threading
 import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.ticker import ScalarFormatter
-
-# --- Custom Matplotlib Widget for Dark Theme ---
-class MplCanvas(FigureCanvas):
-    def __init__(self, parent=None, width=5, height=4, dpi=100):
-        self.fig = plt.Figure(figsize=(width, height), dpi=dpi)
-        super(MplCanvas, self).__init__(self.fig)
-        self.setParent(parent)
-        self.fig.patch.set_facecolor('#1e1e1e')
+import functools
+import hashlib
+import decimal
+from array import array
+
+# --- Matplotlib (imported on first use; it dominates cold-start time) ---
+MplCanvas = None
+ScalarFormatter = None
+
+def load_matplotlib():
+    global MplCanvas, ScalarFormatter
+    if MplCanvas is not None: return
+    import matplotlib
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+    from matplotlib.ticker import ScalarFormatter
+
+    # --- Custom Matplotlib Widget for Dark Theme ---
+    # Keeps the last few rendered frames so flipping back to a chart is a blit, not a redraw.
+    class MplCanvas(FigureCanvas):
+        FRAME_CACHE_SIZE = 8
+
+        def __init__(self, parent=None, width=5, height=4, dpi=100):
+            self.fig = Figure(figsize=(width, height), dpi=dpi)
+            super(MplCanvas, self).__init__(self.fig)
+            self.setParent(parent)
+            self.fig.patch.set_facecolor('#1e1e1e')
+            self.frames = OrderedDict()
+            self.shown_key = None
+            self.layout_mode = None
+
+        # tight_layout starts from the current margins; reset them so reused axes lay out like fresh ones
+        def reset_layout(self):
+            self.fig.subplots_adjust(**{k: matplotlib.rcParams["figure.subplot." + k]
+                                        for k in ("left", "right", "bottom", "top", "wspace", "hspace")})
+
+        def show_cached(self, key):
+            if key == self.shown_key: return True
+            frame = self.frames.get(key)
+            if frame is None: return False
+            self.frames.move_to_end(key)
+            self.restore_region(frame)
+            self.blit(self.fig.bbox)
+            self.shown_key = key
+            return True
+
+        def draw_and_cache(self, key):
+            with PROFILER.span("chart.draw"):
+                self.draw()
+            self.frames[key] = self.copy_from_bbox(self.fig.bbox)
+            while len(self.frames) > self.FRAME_CACHE_SIZE:
+                self.frames.popitem(last=False)
+            self.shown_key = key
+
+# --- Chart Drawing (shared by the Statistics tab and the report export) ---
+def draw_pie(ax, data_map, title, colors=None):
+    ax.clear()
+    ax.set_facecolor('#1e1e1e')
+    filtered_data = {k: v for k, v in data_map.items() if v > 0}
+
+    if not filtered_data:
+        ax.text(0.5, 0.5, "No Data", ha='center', color='white', transform=ax.transAxes)
+        ax.set_title(title, color='white', fontsize=14, fontweight='bold')
+        return
+    
+    labels = list(filtered_data.keys())
+    values = list(filtered_data.values())
+    
+    wedges, texts, autotexts = ax.pie(
+        values, labels=labels, autopct='%1.1f%%', startangle=90, 
+        colors=colors, wedgeprops={'edgecolor': '#1e1e1e', 'linewidth': 2}
+    )
+    for t in texts + autotexts: t.set_color('white')
+    ax.set_title(title, color='white', fontsize=14, fontweight='bold')
+
+# -> (categories, income bars, expense bars) so the Statistics tab can move the bars later, or None
+def draw_category_bars(ax, income_map, expense_map):
+    all_cats = sorted(list(set(list(income_map.keys()) + list(expense_map.keys()))))
+    ax.clear()
+    ax.set_facecolor('#1e1e1e')
+
+    if not all_cats:
+        ax.text(0.5, 0.5, "No Data", ha='center', color='white', transform=ax.transAxes)
+        ax.set_title("Income vs Expense by Category", color='white')
+        return None
+
+    inc_vals = [income_map.get(c, 0) for c in all_cats]
+    exp_vals = [expense_map.get(c, 0) for c in all_cats]
+
+    bar_width = 0.4
+    x = range(len(all_cats))
+
+    inc_bars = ax.bar([i - bar_width/2 for i in x], inc_vals, width=bar_width, label="Income", color="#66BB6A")
+    exp_bars = ax.bar([i + bar_width/2 for i in x], exp_vals, width=bar_width, label="Expense", color="#EF5350")
+
+    if max(inc_vals + exp_vals) > 0:
+        ax.set_ylim(0, max(max(inc_vals), max(exp_vals)) * 1.1)
+    else:
+        ax.set_ylim(0, 10)
+
+    formatter = ScalarFormatter(useOffset=False, useMathText=False)
+    formatter.set_scientific(False)
+    ax.yaxis.set_major_formatter(formatter)
+
+    ax.set_xticks(list(x))
+    ax.set_xticklabels(all_cats, rotation=30, ha='right') 
+    ax.set_xlabel("Category", color='white')
+
+    ax.set_ylabel("Amount (₹)", color='white') 
+
+    ax.tick_params(axis='both', which='major', colors='white', labelcolor='white')
+
+    ax.spines['bottom'].set_color('white')
+    ax.spines['left'].set_color('white')
+    ax.spines['right'].set_color('white')
+    ax.spines['top'].set_color('white')
+
+    ax.legend(facecolor='#333', labelcolor='white')
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    ax.set_title("Income vs Expense by Category", color='white')
+    return all_cats, inc_bars, exp_bars
+
+def draw_trend(ax, mode, period, monthly):
+    months, income, expense = monthly
+    ax.clear()
+    ax.set_facecolor('#1e1e1e')
+
+    if mode == "Line: Running Balance":
+        title = "Running Balance"
+    else:
+        title = "Monthly Income vs Expense"
+
+    if not months:
+        ax.text(0.5, 0.5, "No Data", ha='center', color='white', transform=ax.transAxes)
+        ax.set_title(title, color='white')
+        return
+
+    x = range(len(months))
+    if mode == "Line: Running Balance":
+        balance = (income - expense).cumsum()
+        ax.plot(x, balance, color="#42A5F5", linewidth=2, label="Balance")
+        ax.fill_between(x, balance, 0, where=balance >= 0, color="#66BB6A", alpha=0.25, interpolate=True)
+        ax.fill_between(x, balance, 0, where=balance < 0, color="#EF5350", alpha=0.25, interpolate=True)
+        ax.axhline(0, color='white', linewidth=0.8, alpha=0.5)
+    else:
+        ax.plot(x, income, color="#66BB6A", linewidth=2, marker='o', markersize=3, label="Income")
+        ax.plot(x, expense, color="#EF5350", linewidth=2, marker='o', markersize=3, label="Expense")
+
+    if period in months:
+        ax.axvline(months.index(period), color='#FFCA28', linestyle='--', linewidth=1, label=period)
+
+    step = max(1, len(months) // 24) # keep roughly two years' worth of tick labels visible
+    ax.set_xticks(list(x)[::step])
+    ax.set_xticklabels(months[::step], rotation=30, ha='right')
+    ax.set_xlabel("Month", color='white')
+    ax.set_ylabel("Amount (₹)", color='white')
+
+    formatter = ScalarFormatter(useOffset=False, useMathText=False)
+    formatter.set_scientific(False)
+    ax.yaxis.set_major_formatter(formatter)
+
+    ax.tick_params(axis='both', which='major', colors='white', labelcolor='white')
+    for side in ('bottom', 'left', 'right', 'top'):
+        ax.spines[side].set_color('white')
+
+    ax.legend(facecolor='#333', labelcolor='white')
+    ax.grid(axis='y', linestyle='--', alpha=0.3)
+    ax.set_title(title, color='white')
+
+# --- Profiler (opt-in: --profile or "profile": true in saifu_config.json) ---
+# Records timed spans from every thread plus cProfile data, shows the latest
+# timings in the status bar and, on exit, writes a Chrome trace (open it in
+# chrome://tracing or ui.perfetto.dev) and a .prof file for pstats / snakeviz.
+# While disabled, span() and timed() cost one attribute check.
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self.events = []
+        self.latest = {} # span name -> last duration in seconds
+        self.thread_names = {}
+        self.profiles = [] # finished cProfile.Profile objects from worker threads
+        self.main_profile = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.enabled: return
+        import cProfile
+        self.enabled = True
+        self.main_profile = cProfile.Profile()
+        self.main_profile.enable()
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            thread = threading.current_thread()
+            event = {"name": name, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+                     "ts": round((start - self.t0) * 1e6, 1), "dur": round((end - start) * 1e6, 1)}
+            if args: event["args"] = args
+            with self._lock:
+                self.events.append(event)
+                self.latest[name] = end - start
+                self.thread_names[thread.ident] = thread.name
+
+    def timed(self, name):
+        def decorate(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled: return fn(*args, **kwargs)
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    # cProfile for a worker thread; the GUI thread's profile runs for the whole session
+    @contextlib.contextmanager
+    def profiled(self):
+        if not self.enabled:
+            yield
+            return
+        import cProfile
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError: # Python 3.12+ runs one profiler per process, and the GUI thread's covers all threads
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.append(profile)
+
+    def summary(self):
+        with self._lock:
+            latest = dict(self.latest)
+        return "   ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in sorted(latest.items()))
+
+    def export(self, prefix):
+        import pstats
+        with self._lock:
+            events = list(self.events)
+            names = dict(self.thread_names)
+            profiles = list(self.profiles)
+        meta = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+                for tid, name in names.items()]
+        trace_file, stats_file = prefix + ".trace.json", prefix + ".prof"
+        with open(trace_file, 'w') as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f)
+        self.main_profile.disable()
+        stats = pstats.Stats(self.main_profile)
+        for profile in profiles:
+            stats.add(profile)
+        stats.dump_stats(stats_file)
+        self.main_profile.enable()
+        return trace_file, stats_file
+
+PROFILER = Profiler()
+
+CONFIG_FILE = "saifu_config.json"
+DEFAULT_CONFIG = {"storage": "sqlite", "durability": "transaction", "fsync_interval": 1.0,
+                  "budgets": {}, "budget_alerts": [0.8, 1.0]}
+
+def load_config(config_file=CONFIG_FILE):
+    config = dict(DEFAULT_CONFIG)
+    if os.path.exists(config_file):
+        try:
+            with open(config_file, 'r') as f:
+                config.update(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"Could not read {config_file}: {e}")
+    else:
+        save_config(config, config_file)
+    return config
+
+def save_config(config, config_file=CONFIG_FILE):
+    try:
+        with open(config_file, 'w') as f:
+            json.dump(config, f, indent=4)
+    except OSError as e:
+        print(f"Could not write {config_file}: {e}")
+
+INCOME_CATEGORIES = ["Salary", "Investment", "Freelance", "Gift", "Refund", "Other Income"]
+EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Education", "Other Expense"]
+
+# --- Raw CSV Helpers (rows are read with the byte offset they start at) ---
+FILE_ENCODING = locale.getpreferredencoding(False)
+
+def encode_csv_row(row):
+    return encode_csv_rows([row])
+
+def encode_csv_rows(rows):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue().encode(FILE_ENCODING, errors="replace")
+
+# identifies the first `offset` bytes of a file by the last 64 KiB of them, so a reader
+# that stopped at `offset` can tell an append (same bytes) from a rewrite
+def tail_fingerprint(path, offset, window=65536):
+    if not offset: return hashlib.sha1().hexdigest()
+    with open(path, 'rb') as f:
+        f.seek(max(0, offset - window))
+        return hashlib.sha1(f.read(min(offset, window))).hexdigest()
+
+def read_csv_rows(path, start=0, end=None):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        pending = [] # byte offsets of the lines that make up the current row
+
+        def lines():
+            pos = start
+            for raw in f:
+                if end is not None and pos >= end: break
+                pending.append(pos)
+                pos += len(raw)
+                yield raw.decode(FILE_ENCODING, errors="replace")
+
+        for row in csv.reader(lines()):
+            yield pending[0], row
+            pending.clear()
+
+# --- Fixed-Point Amounts (paise) and Timestamps ---
+EPOCH = datetime.datetime(1970, 1, 1)
+
+def parse_paise(text):
+    text = text.strip()
+    # fast path for the plain "-123.45" the ledger itself writes
+    whole, dot, frac = text.partition(".")
+    digits = whole[1:] if whole.startswith("-") else whole
+    if digits.isdecimal() and (not dot or (frac.isdecimal() and len(frac) <= 2)):
+        paise = int(digits) * 100 + (int(frac.ljust(2, "0")) if frac else 0)
+        return -paise if whole.startswith("-") else paise
+    try:
+        value = decimal.Decimal(text)
+    except decimal.InvalidOperation:
+        return None
+    if not value.is_finite(): return None
+    return int((value * 100).to_integral_value(decimal.ROUND_HALF_UP))
+
+def format_paise(paise):
+    sign = "-" if paise < 0 else ""
+    paise = abs(paise)
+    return f"{sign}{paise // 100}.{paise % 100:02d}"
+
+# "YYYY-MM-DD HH:MM:SS" <-> seconds since EPOCH (wall-clock time, no timezone applied)
+@functools.lru_cache(maxsize=4096)
+def parse_timestamp(text):
+    if len(text) != 19 or text[4] != '-' or text[7] != '-' or text[10] != ' ' or text[13] != ':' or text[16] != ':':
+        return None
+    digits = (text[:4], text[5:7], text[8:10], text[11:13], text[14:16], text[17:19])
+    if not "".join(digits).isdigit(): return None
+    try:
+        return int((datetime.datetime(*map(int, digits)) - EPOCH).total_seconds())
+    except ValueError:
+        return None
+
+def format_timestamp(seconds):
+    return (EPOCH + datetime.timedelta(seconds=seconds)).strftime("%Y-%m-%d %H:%M:%S")
+
+def signed_paise(row):
+    paise = parse_paise(row[1])
+    if paise is None: return 0
+    return paise if row[3] == "Income" else -abs(paise)
+
+# what makes two records the same transaction when importing: time, signed amount and note
+def transaction_key(row):
+    ts = parse_timestamp(row[0])
+    return (row[0] if ts is None else ts, signed_paise(row), row[4])
+
+# --- Columnar Transaction Store ---
+# One typed array per field instead of a list of strings per row: int64 IDs,
+# timestamps and paise, int32 month ordinals, small-int category/type codes and
+# an interned note pool. Deleted rows are only flagged in `alive` until the
+# next compaction.
+class TransactionColumns:
+    INVALID = -(2 ** 63) # timestamp / amount that did not parse; the raw text is kept in .raw
+
+    def __init__(self):
+        self.ids = array('q')
+        self.ts = array('q')
+        self.paise = array('q')
+        self.month = array('i') # year * 12 + (month - 1), or -1
+        self.category = array('H')
+        self.type = array('B')
+        self.note = array('I')
+        self.alive = bytearray()
+        self.raw = {} # position -> (datetime text, amount text)
+        self.live = 0
+        self.categories, self._category_codes = [], {}
+        self.types, self._type_codes = [], {}
+        self.notes, self._note_codes = [], {}
+        for name in INCOME_CATEGORIES + EXPENSE_CATEGORIES:
+            self._intern(name, self.categories, self._category_codes)
+        for name in ("Expense", "Income"):
+            self._intern(name, self.types, self._type_codes)
+        self._intern("", self.notes, self._note_codes)
+        self.INCOME = self._type_codes["Income"]
+        self.note_index = NoteIndex()
+        self.column_index = ColumnIndex()
+
+    @staticmethod
+    def _intern(value, pool, codes):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(pool)
+            pool.append(value)
+        return code
+
+    def __len__(self):
+        return len(self.ids)
+
+    def append(self, row_id, row):
+        pos = len(self.ids)
+        ts, paise = parse_timestamp(row[0]), parse_paise(row[1])
+        if ts is None or paise is None:
+            self.raw[pos] = (row[0], row[1])
+        key = CsvLedger.period_key(row[0])
+        month = int(key[:4]) * 12 + int(key[5:]) - 1 if key and 1 <= int(key[5:]) <= 12 else -1
+        self.ids.append(row_id)
+        self.ts.append(self.INVALID if ts is None else ts)
+        self.paise.append(self.INVALID if paise is None else paise)
+        self.month.append(month)
+        self.category.append(self._intern(row[2], self.categories, self._category_codes))
+        self.type.append(self._intern(row[3], self.types, self._type_codes))
+        self.note.append(self._intern(row[4], self.notes, self._note_codes))
+        self.alive.append(1)
+        self.live += 1
+        return pos
+
+    # IDs are appended in ascending order, so a binary search finds a row
+    def position(self, row_id):
+        pos = bisect.bisect_left(self.ids, row_id)
+        if pos < len(self.ids) and self.ids[pos] == row_id and self.alive[pos]:
+            return pos
+        return None
+
+    def kill(self, pos):
+        self.alive[pos] = 0
+        self.live -= 1
+
+    def row(self, pos):
+        raw = self.raw.get(pos)
+        return [
+            raw[0] if raw else format_timestamp(self.ts[pos]),
+            raw[1] if raw else format_paise(self.paise[pos]),
+            self.categories[self.category[pos]],
+            self.types[self.type[pos]],
+            self.notes[self.note[pos]],
+            str(self.ids[pos]),
+        ]
+
+    def period(self, pos):
+        month = self.month[pos]
+        return f"{month // 12:04d}-{month % 12 + 1:02d}" if month >= 0 else None
+
+    # income amounts count as-is, everything else by magnitude; None if the amount did not parse
+    def rollup_amount(self, pos):
+        paise = self.paise[pos]
+        if paise == self.INVALID: return None
+        return paise if self.type[pos] == self.INCOME else abs(paise)
+
+    def signed_amount(self, pos):
+        paise = self.rollup_amount(pos)
+        if paise is None: return 0
+        return paise if self.type[pos] == self.INCOME else -paise
+
+    def copy_live(self, start, stop, into):
+        for pos in range(start, stop):
+            if self.alive[pos]:
+                into.append(self.ids[pos], self.row(pos))
+
+# --- Transaction Search ---
+# A query is free text plus optional structured terms, all of which must match:
+#   swiggy order      notes containing words starting with "swiggy" and "order"
+#   >500  <=2000  500..2000  =99.50          amount (ignoring sign), in rupees
+#   2024  2024-05  2024-05-03  2024-01..2024-03  from:2024-02 to:2024-06
+#   cat:food  category:"other"  type:income
+class SearchQuery:
+    TOKEN = re.compile(r"[0-9a-z]+")
+    DATE = re.compile(r"(\d{4})(?:-(\d{1,2})(?:-(\d{1,2}))?)?")
+    AMOUNT = re.compile(r"(>=|<=|>|<|=)?₹?(\d[\d,]*(?:\.\d*)?|\.\d+)")
+
+    def __init__(self):
+        self.words = [] # note tokens, each matched as a prefix
+        self.min_paise = self.max_paise = None # absolute amount, inclusive
+        self.start = self.end = None # "YYYY-MM-DD HH:MM:SS", end exclusive
+        self.categories = None # set of category names
+        self.type = None
+
+    def is_empty(self):
+        return not self.words and self.categories is None and self.type is None and \
+            (self.min_paise, self.max_paise, self.start, self.end) == (None, None, None, None)
+
+    # "2024-05" -> ("2024-05-01 00:00:00", "2024-06-01 00:00:00"), or None
+    @classmethod
+    def date_range(cls, text):
+        match = cls.DATE.fullmatch(text)
+        if not match: return None
+        year, month, day = (int(g) if g else None for g in match.groups())
+        if not 1900 <= year <= 2200: return None # more likely a reference number than a year
+        try:
+            start = datetime.datetime(year, month or 1, day or 1)
+            if day: end = start + datetime.timedelta(days=1)
+            elif month: end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+            else: end = datetime.datetime(year + 1, 1, 1)
+        except (ValueError, OverflowError):
+            return None
+        return start.strftime("%Y-%m-%d %H:%M:%S"), end.strftime("%Y-%m-%d %H:%M:%S")
+
+    @classmethod
+    def amount(cls, text):
+        match = cls.AMOUNT.fullmatch(text)
+        if not match: return None, None
+        return match.group(1), parse_paise(match.group(2).replace(",", ""))
+
+    def _limit_dates(self, start, end):
+        if start is not None: self.start = start if self.start is None else max(self.start, start)
+        if end is not None: self.end = end if self.end is None else min(self.end, end)
+
+    def _limit_amounts(self, low, high):
+        if low is not None: self.min_paise = low if self.min_paise is None else max(self.min_paise, low)
+        if high is not None: self.max_paise = high if self.max_paise is None else min(self.max_paise, high)
+
+    @classmethod
+    def parse(cls, text):
+        query = cls()
+        for term in text.lower().split():
+            key, sep, value = term.partition(":")
+            value = value.strip('"')
+            if sep and key in ("cat", "category"):
+                if not value: continue
+                names = {c for c in INCOME_CATEGORIES + EXPENSE_CATEGORIES if c.lower().startswith(value)}
+                query.categories = names if query.categories is None else query.categories | names
+            elif sep and key == "type":
+                query.type = next((t for t in ("Income", "Expense") if t.lower().startswith(value)), query.type)
+            elif sep and key in ("from", "after", "since", "to", "until", "before"):
+                bounds = cls.date_range(value)
+                if bounds is None: continue
+                if key in ("from", "after", "since"): query._limit_dates(bounds[0], None)
+                else: query._limit_dates(None, bounds[1])
+            elif ".." in term:
+                low, high = term.split("..", 1)
+                if cls.date_range(low) and cls.date_range(high):
+                    query._limit_dates(cls.date_range(low)[0], cls.date_range(high)[1])
+                else:
+                    (_, low_paise), (_, high_paise) = cls.amount(low), cls.amount(high)
+                    if low_paise is not None and high_paise is not None: query._limit_amounts(low_paise, high_paise)
+            elif cls.date_range(term):
+                query._limit_dates(*cls.date_range(term))
+            else:
+                op, paise = cls.amount(term)
+                if paise is not None and op:
+                    low = {">": paise + 1, ">=": paise, "=": paise}.get(op)
+                    high = {"<": paise - 1, "<=": paise, "=": paise}.get(op)
+                    query._limit_amounts(low, high)
+                else:
+                    query.words.extend(cls.TOKEN.findall(term))
+        return query
+
+# Inverted index from note tokens to note codes of a TransactionColumns. Notes
+# are interned, so each distinct note is tokenized once; notes added since the
+# last search are indexed on the next one.
+class NoteIndex:
+    def __init__(self):
+        self.postings = {} # token -> note codes
+        self.tokens = [] # sorted, for prefix lookups
+        self.indexed = 0
+
+    def update(self, notes):
+        new_tokens = []
+        for code in range(self.indexed, len(notes)):
+            for token in set(SearchQuery.TOKEN.findall(notes[code].lower())):
+                codes = self.postings.get(token)
+                if codes is None:
+                    codes = self.postings[token] = array('I')
+                    new_tokens.append(token)
+                codes.append(code)
+        self.indexed = len(notes)
+        if len(new_tokens) > 64:
+            self.tokens = sorted(self.tokens + new_tokens)
+        else:
+            for token in new_tokens:
+                bisect.insort(self.tokens, token)
+
+    # note codes whose note has, for every word, a token starting with it
+    def matching(self, words):
+        import numpy as np
+        result = None
+        for word in words:
+            start = bisect.bisect_left(self.tokens, word)
+            stop = bisect.bisect_left(self.tokens, word + "\uffff", start)
+            codes = [np.frombuffer(self.postings[t], dtype=np.uint32) for t in self.tokens[start:stop]]
+            codes = np.unique(np.concatenate(codes)) if codes else np.zeros(0, dtype=np.uint32)
+            result = codes if result is None else np.intersect1d(result, codes, assume_unique=True)
+            if not len(result): break
+        return result
+
+# Search index over the amount, category and type columns of a TransactionColumns:
+# positions ordered by magnitude, and ascending positions per category and type
+# code. Columns only grow until compaction builds new ones, so rows added since
+# the last search are merged in on the next one; deleted rows stay indexed and are
+# dropped by the alive check.
+class ColumnIndex:
+    def __init__(self):
+        self.amounts = self.by_amount = None # sorted magnitudes, and the positions they belong to
+        self.by_category, self.by_type = {}, {} # code -> positions
+        self.indexed = 0
+
+    def update(self, columns):
+        import numpy as np
+        n, start = len(columns), self.indexed
+        if start == n: return
+        paise = np.frombuffer(columns.paise, dtype=np.int64, count=n)[start:]
+        valid = np.flatnonzero(paise != columns.INVALID)
+        amounts = np.abs(paise[valid])
+        order = np.argsort(amounts, kind="stable")
+        amounts, positions = amounts[order], valid[order] + start
+        if self.amounts is None:
+            self.amounts, self.by_amount = amounts, positions
+        else:
+            at = np.searchsorted(self.amounts, amounts, side="right")
+            self.amounts, self.by_amount = np.insert(self.amounts, at, amounts), np.insert(self.by_amount, at, positions)
+        self._add_codes(np, self.by_category, np.frombuffer(columns.category, dtype=np.uint16, count=n)[start:], start)
+        self._add_codes(np, self.by_type, np.frombuffer(columns.type, dtype=np.uint8, count=n)[start:], start)
+        self.indexed = n
+
+    @staticmethod
+    def _add_codes(np, index, codes, start):
+        order = np.argsort(codes, kind="stable")
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        for group in np.split(order, bounds):
+            code = int(codes[group[0]])
+            positions = group + start
+            index[code] = positions if code not in index else np.concatenate((index[code], positions))
+
+    # positions whose magnitude is in [low, high] (either may be None), in no particular order
+    def amount_range(self, low, high):
+        import numpy as np
+        start = 0 if low is None else np.searchsorted(self.amounts, low, side="left")
+        stop = len(self.amounts) if high is None else np.searchsorted(self.amounts, high, side="right")
+        return self.by_amount[start:max(start, stop)]
+
+    # ascending positions with any of the codes
+    def with_codes(self, index, codes):
+        import numpy as np
+        groups = [index[code] for code in codes if code in index]
+        if len(groups) == 1: return groups[0]
+        return np.sort(np.concatenate(groups)) if groups else np.zeros(0, dtype=np.int64)
+
+# Read-only, list-like view of some rows of a TransactionColumns; rows are
+# formatted only when the table asks for them.
+class ColumnRows:
+    def __init__(self, columns, positions):
+        self.columns = columns
+        self.positions = positions
+        self._last = (None, None)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, i):
+        if self._last[0] != i:
+            self._last = (i, self.columns.row(self.positions[i]))
+        return self._last[1]
+
+# --- Durability: write-ahead log and group commit ---
+# "durability": "transaction" (the default) makes every commit durable before it
+# returns, and commits racing each other share one fsync. "periodic" returns as
+# soon as the bytes are written and fsyncs in the background every
+# "fsync_interval" seconds, trading the last moments before a crash for speed.
+class Durability:
+    def __init__(self, mode="transaction", interval=1.0):
+        self.mode = mode
+        self.interval = interval
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def committed(self, log, ticket):
+        if self.mode != "periodic":
+            log.sync(ticket)
+            return
+        with self._lock:
+            self._dirty.add(log)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        for log in dirty:
+            log.sync()
+
+# An append-only file kept open for writing. Every write gets a ticket; sync(ticket)
+# returns at once if an fsync that started after that write has already finished,
+# so one fsync covers every writer that was waiting for it.
+class AppendLog:
+    def __init__(self, path, durability):
+        self.path = path
+        self.durability = durability
+        self._file = None
+        self._written = 0
+        self._synced = 0
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+
+    def write(self, data):
+        with self._lock:
+            if self._file is None: self._file = open(self.path, 'ab')
+            self._file.write(data)
+            self._file.flush()
+            self._written += 1
+            return self._written
+
+    def commit(self, ticket):
+        self.durability.committed(self, ticket)
+
+    def sync(self, ticket=None):
+        with self._sync_lock:
+            if ticket is not None and self._synced >= ticket: return
+            with self._lock:
+                target, f = self._written, self._file
+            if f is not None: os.fsync(f.fileno())
+            self._synced = max(self._synced, target)
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    # complete records only; a torn last line was never committed
+    def read(self):
+        if not os.path.exists(self.path): return []
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        return list(csv.reader(io.StringIO(data.decode(FILE_ENCODING, errors="replace"), newline='')))
+
+    # Empties the log once its contents are safe elsewhere. Truncating (rather than
+    # replacing) keeps handles other processes hold on the file valid.
+    def reset(self):
+        with self._sync_lock, self._lock:
+            if os.path.exists(self.path): os.truncate(self.path, 0)
+            self._synced = self._written
+
+    def close(self):
+        self.sync()
+        with self._lock:
+            if self._file is not None: self._file.close()
+            self._file = None
+
+def replace_file(tmp_file, path):
+    os.replace(tmp_file, path)
+    if os.name == "posix": # make the rename itself durable
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+def fsync_path(path):
+    with open(path, 'ab') as f:
+        os.fsync(f.fileno())
+
+# --- Storage Backends ---
+# Every ledger exposes the same queries: periods(), fetch(period) -> (ids, rows),
+# iter_fetch(period, chunk_size) -> (ids, rows, net), totals(period), append(row) -> id,
+# append_many(rows) -> ids, delete(ids), transaction_keys(), refresh(), watch_paths() and
+# iter_search(period, query, chunk_size) -> (ids, rows, net) and close(), where ids are
+# stable transaction IDs and money is summed in exact paise. Reads are safe to run
+# from worker threads. refresh() picks up writes made by other processes (such as
+# --import) and bumps version when it finds any; watch_paths() names the files
+# those writes touch.
+def open_ledger(data_file, config):
+    durability = Durability(config.get("durability", "transaction"), float(config.get("fsync_interval", 1.0)))
+    if config.get("storage") == "csv":
+        return CsvLedger(data_file, durability)
+    if config.get("storage") == "partitioned":
+        return PartitionedLedger(data_file, durability)
+    return SqliteLedger(os.path.splitext(data_file)[0] + ".db", csv_file=data_file, durability=durability)
+
+# --- CSV Ledger (parsed once into columns, updated in place on writes) ---
+# Every row carries a stable integer ID in its sixth column; rows written without
+# one (by hand, say) are numbered in file order as they are read, and the number
+# is written next to them at the next compaction. Deletes append the
+# IDs as tombstones to a journal instead of rewriting the file; a background
+# compaction folds them in once enough have piled up. Appends are logged to a
+# write-ahead log first, which load() replays after a crash (and uses to trim a
+# half-written last line); the data file is fsynced and the log emptied at
+# checkpoints. A read-only ledger (used to import or migrate the CSV) applies the
+# journal and the log in memory and never writes any of the files.
+class CsvLedger:
+    COMPACT_MIN_TOMBSTONES = 64
+    COMPACT_RATIO = 0.1
+    ROLLUP_FORMAT = 2 # totals stored as integer paise
+    CHECKPOINT_BYTES = 1024 * 1024
+
+    def __init__(self, data_file, durability=None, read_only=False):
+        self.data_file = data_file
+        self.read_only = read_only
+        self.rollup_file = os.path.splitext(data_file)[0] + ".rollup.json"
+        self.journal_file = os.path.splitext(data_file)[0] + ".journal"
+        self.durability = durability or Durability()
+        self.wal = AppendLog(os.path.splitext(data_file)[0] + ".wal", self.durability)
+        self.journal = AppendLog(self.journal_file, self.durability)
+        self.columns = TransactionColumns()
+        self.next_id = 1
+        self.rollup = {}
+        self.tombstone_count = 0
+        self.version = 0 # bumped on every write, so caches can key on it
+        self._seen = (0, 0, 0) # (data bytes, data mtime, journal bytes) already reflected in memory
+        self._period_index = None
+        self._period_counts = None
+        self._lock = threading.RLock()
+        self._generation = 0
+        self._compactor = None
+        self.load()
+
+    @staticmethod
+    def period_key(date_time_str):
+        key = date_time_str[:7]
+        if len(key) == 7 and key[4] == '-' and key[:4].isdigit() and key[5:].isdigit():
+            return key
+        return None
+
+    @staticmethod
+    def parse_id(value):
+        return int(value) if value.isdigit() else None
+
+    @PROFILER.timed("csv.load")
+    def load(self):
+        self.columns = TransactionColumns()
+        self.next_id = 1
+        self._period_index = None
+        logged = self.wal.read()
+        if not os.path.exists(self.data_file) and not logged: return
+        end = self._repair_tail(self.data_file, logged, self.read_only) if os.path.exists(self.data_file) else None
+        dead_ids, dead_offsets = self._read_journal()
+        self.tombstone_count = len(dead_ids) + len(dead_offsets)
+        for offset, row in read_csv_rows(self.data_file, end=end):
+            if len(row) < 5: continue
+            row_id = self.parse_id(row[5]) if len(row) > 5 else None
+            if row_id is None or row_id < self.next_id:
+                # rows written before IDs existed (or out of order); journals of that era addressed them by byte offset
+                if dead_offsets.get(offset) == row[:5]: continue
+                row_id = self.next_id
+            self.next_id = row_id + 1 # never hand out a deleted row's ID again
+            if row_id not in dead_ids: self.columns.append(row_id, row)
+        self._replay(logged, dead_ids)
+        if not self.load_rollup():
+            self.rebuild_rollup()
+        if logged and not self.read_only: self._checkpoint()
+        self._mark_seen()
+
+    # A crash mid-append can leave a partial last line; if it is the start of a
+    # logged record it is cut off (the record is replayed), otherwise the line was
+    # written by hand and only gets the newline later appends need. A read-only
+    # ledger leaves the file as it is; -> where reading has to stop instead (or None)
+    @staticmethod
+    def _repair_tail(data_file, logged, read_only=False):
+        with open(data_file, 'rb' if read_only else 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0: return None
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+            if tail.endswith(b"\n"): return None
+            start = tail.rfind(b"\n") + 1
+            partial = tail[start:]
+            if any(encode_csv_row(record).startswith(partial) for record in logged):
+                if read_only: return size - len(partial)
+                f.truncate(size - len(partial))
+            elif not read_only:
+                f.write(b"\r\n")
+        return None
+
+    # the same repair without loading the ledger, for readers that must not see the file shrink
+    @classmethod
+    def repair(cls, data_file):
+        if not os.path.exists(data_file): return
+        cls._repair_tail(data_file, AppendLog(os.path.splitext(data_file)[0] + ".wal", None).read())
+
+    # appends the logged rows that never reached the data file
+    def _replay(self, logged, dead_ids):
+        missing = []
+        for record in logged:
+            row_id = self.parse_id(record[5]) if len(record) > 5 else None
+            if row_id is None or row_id < self.next_id or row_id in dead_ids: continue
+            missing.append(record[:6])
+            self.next_id = row_id + 1
+        if not missing: return
+        if self.read_only:
+            for record in missing:
+                self.columns.append(int(record[5]), record)
+            return
+        with open(self.data_file, 'ab') as f:
+            f.write(encode_csv_rows(missing))
+            f.flush()
+            os.fsync(f.fileno())
+        for record in missing:
+            self.columns.append(int(record[5]), record)
+
+    def _checkpoint(self):
+        fsync_path(self.data_file)
+        self.wal.reset()
+
+    def close(self):
+        with self._lock:
+            if os.path.exists(self.data_file) and self.wal.size() and not self.read_only: self._checkpoint()
+            self.wal.close()
+            self.journal.close()
+
+    def _stat(self):
+        data = os.stat(self.data_file) if os.path.exists(self.data_file) else None
+        journal_size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        return (data.st_size, data.st_mtime_ns, journal_size) if data else (0, 0, journal_size)
+
+    def _mark_seen(self):
+        self._seen = self._stat()
+
+    def watch_paths(self):
+        return [self.data_file, self.journal_file]
+
+    def refresh(self):
+        with self._lock:
+            seen, now = self._seen, self._stat()
+            if now == seen: return False
+            if now[2] != seen[2] or now[0] <= seen[0]:
+                self.load() # deleted from, compacted or rewritten elsewhere
+            elif not self._load_tail(seen[0], now):
+                return False
+            self.version += 1
+            return True
+
+    # Reads rows appended by another process, numbering rows without an ID as load() would;
+    # a row whose ID is already taken forces a full reload
+    def _load_tail(self, start, stat):
+        with open(self.data_file, 'rb') as f:
+            f.seek(start)
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1] # a half-written last line is read next time
+        if not data: return False
+        rows, next_id = [], self.next_id
+        for row in csv.reader(io.StringIO(data.decode(FILE_ENCODING, errors="replace"), newline='')):
+            if len(row) < 5: continue
+            row_id = self.parse_id(row[5]) if len(row) > 5 else None
+            if row_id is not None and row_id < next_id:
+                self.load()
+                return True
+            if row_id is None: row_id = next_id
+            rows.append((row_id, row))
+            next_id = row_id + 1
+        for row_id, row in rows:
+            self._add_row(row_id, row)
+        self.next_id = next_id
+        self.save_rollup()
+        self._seen = (start + len(data), stat[1], stat[2])
+        return True
+
+    def transaction_keys(self):
+        with self._lock:
+            c = self.columns
+            return [(c.raw[pos][0] if c.ts[pos] == c.INVALID else c.ts[pos], c.signed_amount(pos), c.notes[c.note[pos]])
+                    for pos in range(len(c)) if c.alive[pos]]
+
+    @PROFILER.timed("csv.read_journal")
+    def _read_journal(self):
+        dead_ids, dead_offsets = set(), {}
+        if os.path.exists(self.journal_file):
+            for _, record in read_csv_rows(self.journal_file):
+                if len(record) == 1 and self.parse_id(record[0]) is not None:
+                    dead_ids.add(int(record[0]))
+                elif len(record) >= 6 and record[0].isdigit():
+                    dead_offsets[int(record[0])] = record[1:6]
+        return dead_ids, dead_offsets
+
+    def _reset_journal(self):
+        self.journal.reset()
+        self.tombstone_count = 0
+
+    # YYYY-MM -> ascending row positions, maintained in place once built; dead rows are skipped on read.
+    # Live rows per period are counted alongside, so periods() never walks the rows.
+    def period_index(self):
+        if self._period_index is None:
+            index, counts = {}, {}
+            columns = self.columns
+            for pos in range(len(columns)):
+                period = columns.period(pos)
+                if period is not None:
+                    index.setdefault(period, array('q')).append(pos)
+                    if columns.alive[pos]: counts[period] = counts.get(period, 0) + 1
+            self._period_index, self._period_counts = index, counts
+        return self._period_index
+
+    def periods(self):
+        with self._lock:
+            self.period_index()
+            return sorted((p for p, count in self._period_counts.items() if count), reverse=True)
+
+    def positions_for_period(self, period):
+        alive = self.columns.alive
+        if period == "All Periods" or not period:
+            return [pos for pos in range(len(alive)) if alive[pos]]
+        return [pos for pos in self.period_index().get(period, ()) if alive[pos]]
+
+    def fetch(self, period):
+        with self._lock:
+            positions = self.positions_for_period(period)
+            return [self.columns.ids[pos] for pos in positions], ColumnRows(self.columns, positions)
+
+    def iter_fetch(self, period, chunk_size):
+        with self._lock:
+            columns = self.columns
+            positions = self.positions_for_period(period)
+        return self._iter_positions(columns, positions, chunk_size)
+
+    # positions is a list or a NumPy array; an array is turned into ints a chunk at a time
+    @staticmethod
+    def _iter_positions(columns, positions, chunk_size):
+        for start in range(0, len(positions), chunk_size):
+            chunk = positions[start:start + chunk_size]
+            if not isinstance(chunk, list): chunk = chunk.tolist()
+            yield ([columns.ids[pos] for pos in chunk], ColumnRows(columns, chunk),
+                   sum(columns.signed_amount(pos) for pos in chunk) / 100)
+
+    def iter_search(self, period, query, chunk_size):
+        with self._lock:
+            columns = self.columns
+            positions = self._search_positions(period, query)
+        return self._iter_positions(columns, positions, chunk_size)
+
+    # The indexed filter (period, type, category or amount) that lets through the
+    # fewest rows supplies the candidates, and the other filters are boolean masks
+    # over just those rows. The NumPy views must be gone before the lock is
+    # released, since an array with exported buffers cannot grow.
+    @PROFILER.timed("csv.search")
+    def _search_positions(self, period, query):
+        import numpy as np
+        columns = self.columns
+        n = len(columns)
+        if not n: return []
+        index = columns.column_index
+        index.update(columns)
+        type_code = columns.types.index(query.type) if query.type is not None else None
+        if query.categories is not None:
+            category_codes = [columns._category_codes[c] for c in query.categories if c in columns._category_codes]
+        by_period = period and period != "All Periods"
+        by_amount = query.min_paise is not None or query.max_paise is not None
+        sources = {} # filter -> (rows it lets through, its positions)
+        if by_period:
+            rows = self.period_index().get(period, ())
+            sources["period"] = (len(rows), lambda: np.array(rows, dtype=np.int64))
+        if type_code is not None:
+            sources["type"] = (len(index.by_type.get(type_code, ())), lambda: index.with_codes(index.by_type, [type_code]))
+        if query.categories is not None:
+            sources["category"] = (sum(len(index.by_category.get(code, ())) for code in category_codes),
+                                   lambda: index.with_codes(index.by_category, category_codes))
+        if by_amount:
+            in_range = index.amount_range(query.min_paise, query.max_paise)
+            sources["amount"] = (len(in_range), lambda: in_range)
+        source = min(sources, key=lambda name: sources[name][0]) if sources else None
+        if source is None:
+            positions = None # every row
+        elif source != "amount":
+            positions = sources[source][1]()
+        elif len(in_range) > n // 16: # cheaper to sort by marking a mask than by comparing
+            marked = np.zeros(n, dtype=bool)
+            marked[in_range] = True
+            positions = np.flatnonzero(marked)
+        else:
+            positions = np.sort(in_range)
+        if positions is not None and not len(positions): return []
+        column = lambda values, dtype: np.frombuffer(values, dtype=dtype, count=n)
+        take = (lambda values, dtype: column(values, dtype)) if positions is None else \
+            (lambda values, dtype: column(values, dtype)[positions])
+        def allowed(codes, pool): # code -> wanted lookup table, so membership is one gather
+            table = np.zeros(len(pool), dtype=bool)
+            table[codes] = True
+            return table
+        mask = take(columns.alive, np.uint8).astype(bool)
+        if by_period and source != "period":
+            mask &= take(columns.month, np.int32) == int(period[:4]) * 12 + int(period[5:7]) - 1
+        if type_code is not None and source != "type":
+            mask &= take(columns.type, np.uint8) == type_code
+        if query.categories is not None and source != "category":
+            mask &= allowed(category_codes, columns.categories)[take(columns.category, np.uint16)]
+        if by_amount and source != "amount":
+            paise = take(columns.paise, np.int64)
+            mask &= paise != columns.INVALID
+            paise = np.abs(np.where(mask, paise, 0))
+            if query.min_paise is not None: mask &= paise >= query.min_paise
+            if query.max_paise is not None: mask &= paise <= query.max_paise
+        if query.start is not None or query.end is not None:
+            ts = take(columns.ts, np.int64)
+            mask &= ts != columns.INVALID
+            if query.start is not None: mask &= ts >= parse_timestamp(query.start)
+            if query.end is not None: mask &= ts < parse_timestamp(query.end)
+        if query.words:
+            columns.note_index.update(columns.notes)
+            mask &= allowed(columns.note_index.matching(query.words), columns.notes)[take(columns.note, np.uint32)]
+        return np.flatnonzero(mask) if positions is None else positions[mask]
+
+    # --- Rollup Store: period -> type -> category -> total paise ---
+    def _file_stamp(self):
+        st = os.stat(self.data_file)
+        journal_size = os.path.getsize(self.journal_file) if os.path.exists(self.journal_file) else 0
+        return [st.st_size, st.st_mtime_ns, journal_size]
+
+    def load_rollup(self):
+        if not os.path.exists(self.data_file) or not os.path.exists(self.rollup_file): return False
+        try:
+            with open(self.rollup_file, 'r') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get("format") != self.ROLLUP_FORMAT or saved.get("stamp") != self._file_stamp(): return False
+        self.rollup = saved.get("rollup", {})
+        return True
+
+    def save_rollup(self):
+        if self.read_only or not os.path.exists(self.data_file): return
+        tmp_file = self.rollup_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({"format": self.ROLLUP_FORMAT, "stamp": self._file_stamp(), "rollup": self.rollup}, f)
+        os.replace(tmp_file, self.rollup_file)
+
+    # grouped by (month, income, category) in a single bincount
+    @PROFILER.timed("rollup.rebuild")
+    def rebuild_rollup(self):
+        import numpy as np
+        columns = self.columns
+        n, names = len(columns), list(columns.categories)
+        paise = np.frombuffer(columns.paise, dtype=np.int64, count=n)
+        keep = (np.frombuffer(columns.alive, dtype=np.uint8, count=n) != 0) & (paise != columns.INVALID)
+        paise = paise[keep]
+        income = np.frombuffer(columns.type, dtype=np.uint8, count=n)[keep] == columns.INCOME
+        month = np.frombuffer(columns.month, dtype=np.int32, count=n)[keep].astype(np.int64)
+        category = np.frombuffer(columns.category, dtype=np.uint16, count=n)[keep]
+        keys, inverse = np.unique(((month + 1) * 2 + income) * len(names) + category, return_inverse=True)
+        sums = np.rint(np.bincount(inverse, weights=np.where(income, paise, np.abs(paise)), minlength=len(keys)))
+        rollup = {}
+        for key, total in zip(keys.tolist(), sums.astype(np.int64).tolist()):
+            group, cat = divmod(key, len(names))
+            month, is_income = divmod(group, 2)
+            period = f"{(month - 1) // 12:04d}-{(month - 1) % 12 + 1:02d}" if month else ""
+            for p in (period, "All Periods"):
+                cats = rollup.setdefault(p, {}).setdefault("Income" if is_income else "Expense", {})
+                cats[names[cat]] = cats.get(names[cat], 0) + total
+        for types in rollup.values():
+            for cats in types.values():
+                for cat in [c for c, total in cats.items() if total == 0]:
+                    del cats[cat]
+        self.rollup = rollup
+        self.save_rollup()
+
+    def _rollup_add(self, pos, sign=1):
+        columns = self.columns
+        paise = columns.rollup_amount(pos)
+        if paise is None: return
+        typ = "Income" if columns.type[pos] == columns.INCOME else "Expense"
+        cat = columns.categories[columns.category[pos]]
+        for period in (columns.period(pos) or "", "All Periods"):
+            cats = self.rollup.setdefault(period, {}).setdefault(typ, {})
+            total = cats.get(cat, 0) + sign * paise
+            if total == 0:
+                cats.pop(cat, None)
+            else:
+                cats[cat] = total
+
+    @PROFILER.timed("ledger.totals")
+    def totals(self, period):
+        with self._lock:
+            types = self.rollup.get(period or "All Periods", {})
+            income_paise = dict(types.get("Income", {}))
+            expense_paise = dict(types.get("Expense", {}))
+        return ({k: v / 100 for k, v in income_paise.items()}, {k: v / 100 for k, v in expense_paise.items()},
+                sum(income_paise.values()) / 100, sum(expense_paise.values()) / 100)
+
+    def append(self, row):
+        return self.append_many([row])[0]
+
+    # one write for the whole batch; the rollup is saved once at the end
+    # ids may be given (ascending, above every existing ID) by a caller that allocates them, e.g. PartitionedLedger
+    @PROFILER.timed("ledger.append")
+    def append_many(self, rows, ids=None):
+        with self._lock:
+            self.refresh() # take in rows other processes appended, so IDs stay unique
+            rows = list(rows)
+            if ids is None: ids = list(range(self.next_id, self.next_id + len(rows)))
+            records = [list(row[:5]) + [str(row_id)] for row_id, row in zip(ids, rows)]
+            if not records: return ids
+            self.next_id = max(self.next_id, ids[-1] + 1)
+            data = encode_csv_rows(records)
+            ticket = self.wal.write(data)
+            with open(self.data_file, 'ab') as f:
+                f.write(data)
+            for row_id, row in zip(ids, records):
+                self._add_row(row_id, row)
+            self.save_rollup()
+            if self.wal.size() > self.CHECKPOINT_BYTES: self._checkpoint()
+            self._mark_seen()
+            self.version += 1
+        self.wal.commit(ticket) # outside the lock, so concurrent writers can share the fsync
+        return ids
+
+    def _add_row(self, row_id, row):
+        pos = self.columns.append(row_id, row)
+        if self._period_index is not None:
+            period = self.columns.period(pos)
+            if period is not None:
+                self._period_index.setdefault(period, array('q')).append(pos)
+                self._period_counts[period] = self._period_counts.get(period, 0) + 1
+        self._rollup_add(pos)
+
+    @PROFILER.timed("ledger.delete")
+    def delete(self, ids):
+        with self._lock:
+            positions = {}
+            for row_id in ids:
+                pos = self.columns.position(row_id)
+                if pos is not None: positions[row_id] = pos
+            if not positions: return
+            ticket = self.journal.write(encode_csv_rows([[row_id] for row_id in positions]))
+            for pos in positions.values():
+                self._rollup_add(pos, sign=-1)
+                self.columns.kill(pos)
+                period = self.columns.period(pos)
+                if self._period_index is not None and period is not None:
+                    self._period_counts[period] -= 1
+            self.tombstone_count += len(positions)
+            self._generation += 1
+            self.version += 1
+            self.save_rollup()
+            self._mark_seen()
+        self.journal.commit(ticket)
+        if self.tombstone_count >= max(self.COMPACT_MIN_TOMBSTONES, self.columns.live * self.COMPACT_RATIO):
+            self.compact_in_background()
+
+    # --- Compaction: rewrite live rows to a temp file and swap it in atomically ---
+    def compact_in_background(self):
+        if self._compactor is not None and self._compactor.is_alive(): return
+        self._compactor = threading.Thread(target=self.compact, daemon=True)
+        self._compactor.start()
+
+    @PROFILER.timed("csv.compact")
+    def compact(self):
+        with self._lock:
+            columns = self.columns
+            snapshot_len = len(columns)
+            generation = self._generation
+            base_size = os.path.getsize(self.data_file)
+
+        compacted = TransactionColumns()
+        columns.copy_live(0, snapshot_len, compacted)
+        tmp_file = self.data_file + ".compact"
+        with open(tmp_file, 'wb') as f:
+            for pos in range(len(compacted)):
+                f.write(encode_csv_row(compacted.row(pos)))
+            f.flush()
+            os.fsync(f.fileno())
+
+        with self._lock:
+            if generation != self._generation: # a delete landed mid-compaction; retry later
+                os.remove(tmp_file)
+                return
+            # carry over rows appended while the snapshot was being written: the ones already
+            # read from memory, so they keep the IDs they were given, and the rest as they are
+            carried = len(compacted)
+            columns.copy_live(snapshot_len, len(columns), compacted)
+            with open(self.data_file, 'rb') as src, open(tmp_file, 'ab') as dst:
+                dst.write(encode_csv_rows([compacted.row(pos) for pos in range(carried, len(compacted))]))
+                src.seek(max(base_size, self._seen[0]))
+                shutil.copyfileobj(src, dst)
+                dst.flush()
+                os.fsync(dst.fileno())
+            replace_file(tmp_file, self.data_file)
+            self.columns = compacted
+            # numbered from the last row kept, as a fresh load would, so rows read later without an ID match it
+            self.next_id = compacted.ids[-1] + 1 if len(compacted) else 1
+            self._period_index = None
+            self._reset_journal()
+            self.wal.reset() # everything appended so far is in the fsynced file
+            self.save_rollup()
+            self._mark_seen()
+
+# --- Period Scanner (memory-mapped; finds YYYY-MM keys without parsing rows) ---
+# Looks only at the first eight bytes of each line, so the filters can be filled
+# at startup while the ledger is still parsing the file. Rows deleted through the
+# journal are still counted until compaction; the ledger has the exact list. A
+# mapped file must not shrink under the scan, so it starts once the ledger has
+# repaired the file's tail (see CsvLedger.repair). Where it stopped is saved next
+# to the file, so the next start only scans what was appended since.
+class PeriodScanner:
+    WINDOW = 16 * 1024 * 1024
+    STATE_FORMAT = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.state_file = os.path.splitext(path)[0] + ".periods.json"
+
+    # -> (offset, in_quotes, counts) to resume from; a rewritten file starts over
+    def _resume(self, st):
+        try:
+            with open(self.state_file, 'r') as f:
+                saved = json.load(f)
+            if saved.get("format") != self.STATE_FORMAT: return 0, False, {}
+            offset, counts = saved["offset"], {int(k): v for k, v in saved["counts"].items()}
+            if [st.st_size, st.st_mtime_ns] != saved["stamp"]:
+                if offset > st.st_size or tail_fingerprint(self.path, offset) != saved["fingerprint"]:
+                    return 0, False, {}
+            return offset, saved["in_quotes"], counts
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            return 0, False, {}
+
+    def _save(self, offset, in_quotes, counts):
+        try:
+            st = os.stat(self.path)
+            state = {"format": self.STATE_FORMAT, "stamp": [st.st_size, st.st_mtime_ns], "offset": offset,
+                     "fingerprint": tail_fingerprint(self.path, offset), "in_quotes": in_quotes, "counts": counts}
+            tmp_file = self.state_file + ".tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(state, f)
+            os.replace(tmp_file, self.state_file)
+        except OSError as e:
+            print(f"Could not save the period scan: {e}")
+
+    @PROFILER.timed("scan.periods")
+    def scan(self):
+        import numpy as np
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return {}
+        size = st.st_size
+        # in_quotes: the last scanned line ended inside a quoted field; counts: month ordinal -> rows
+        offset, in_quotes, counts = self._resume(st)
+        if offset >= size: return counts # nothing appended (an empty file can't be mapped either)
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            while offset < size:
+                end = mm.rfind(b"\n", offset, min(offset + self.WINDOW, size)) + 1
+                if end == 0: end = mm.find(b"\n", offset + self.WINDOW) + 1 # one line longer than the window
+                if end == 0: break # unterminated last line
+                in_quotes = self._scan_lines(np, np.frombuffer(mm, dtype=np.uint8, count=end - offset, offset=offset),
+                                             in_quotes, counts)
+                offset = end
+        self._save(offset, in_quotes, counts)
+        return counts
+
+    # buf starts at a line start and ends just after a newline; -> whether it ends inside quotes
+    @staticmethod
+    def _scan_lines(np, buf, in_quotes, counts):
+        newlines = np.flatnonzero(buf == 10)
+        starts = np.concatenate(([0], newlines[:-1] + 1))
+        # a line only starts a row if the quotes before it are balanced
+        quotes = np.flatnonzero(buf == 34)
+        open_before = (np.searchsorted(quotes, starts) + in_quotes) % 2 == 1
+        starts = starts[~open_before & (starts + 8 <= len(buf))]
+        head = buf[starts[:, None] + np.arange(8)].astype(np.int32)
+        digits = head[:, [0, 1, 2, 3, 5, 6]] - 48
+        month = digits[:, 4] * 10 + digits[:, 5]
+        valid = ((digits >= 0) & (digits <= 9)).all(axis=1) & (head[:, 4] == 45) & (head[:, 7] == 45)
+        valid &= (month >= 1) & (month <= 12)
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        rows = np.bincount((year * 12 + month - 1)[valid])
+        ordinals = np.flatnonzero(rows)
+        for ordinal, count in zip(ordinals.tolist(), rows[ordinals].tolist()):
+            counts[ordinal] = counts.get(ordinal, 0) + count
+        return bool((len(quotes) + in_quotes) % 2)
+
+    def periods(self):
+        return [f"{o // 12:04d}-{o % 12 + 1:02d}" for o in sorted(self.scan(), reverse=True)]
+
+# --- Partitioned CSV Ledger (one CSV per month plus a manifest) ---
+# finance_data_partitions/2024-05.csv holds May 2024, undated.csv the rows
+# without a usable date; each is a CsvLedger with its own journal and rollup,
+# opened only when a query needs it. manifest.json keeps the next ID and, per
+# partition, the live row count, ID range and income/expense totals, so period
+# lists, totals and the trend charts never open a partition, and a delete only
+# ever compacts its own month. An existing finance_data.csv is split into
+# partitions on first open and left in place. The manifest also records each
+# partition's size, so one written after the last manifest save (a crash in
+# between) is noticed and re-described on open.
+class PartitionedLedger:
+    FORMAT = 1
+    UNDATED = "undated"
+
+    def __init__(self, data_file, durability=None):
+        self.data_file = data_file
+        self.durability = durability or Durability()
+        self.directory = os.path.splitext(data_file)[0] + "_partitions"
+        self.manifest_file = os.path.join(self.directory, "manifest.json")
+        self.partitions = {} # key -> open CsvLedger
+        self.manifest = {"format": self.FORMAT, "next_id": 1, "partitions": {}}
+        self.version = 0
+        self._manifest_stamp = None
+        self._lock = threading.RLock()
+        os.makedirs(self.directory, exist_ok=True)
+        if not self.load_manifest() and os.path.exists(data_file):
+            self.migrate()
+        self.recover()
+
+    @staticmethod
+    def partition_key(date_time_str):
+        key = CsvLedger.period_key(date_time_str)
+        return key if key and 1 <= int(key[5:]) <= 12 else PartitionedLedger.UNDATED
+
+    # --- Manifest ---
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_file): return False
+        try:
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get("format") != self.FORMAT: return False
+        self.manifest = manifest
+        self._manifest_stamp = os.stat(self.manifest_file).st_mtime_ns
+        return True
+
+    def save_manifest(self):
+        tmp_file = self.manifest_file + ".tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        replace_file(tmp_file, self.manifest_file)
+        self._manifest_stamp = os.stat(self.manifest_file).st_mtime_ns
+
+    def _describe(self, ledger):
+        ids = ledger.columns.ids
+        totals = ledger.rollup.get("All Periods", {})
+        return {"rows": ledger.columns.live, "min_id": ids[0] if len(ids) else None,
+                "max_id": ids[-1] if len(ids) else None, "bytes": os.path.getsize(ledger.data_file),
+                "totals": {typ: dict(totals.get(typ, {})) for typ in ("Income", "Expense")}}
+
+    @PROFILER.timed("partitions.migrate")
+    def migrate(self):
+        source = CsvLedger(self.data_file, read_only=True) # the original files stay as they are
+        columns = source.columns
+        groups = {}
+        for pos in range(len(columns)):
+            if columns.alive[pos]:
+                groups.setdefault(columns.period(pos) or self.UNDATED, []).append(pos)
+        partitions = {}
+        for key, positions in groups.items():
+            path = os.path.join(self.directory, key + ".csv")
+            tmp_file = path + ".tmp"
+            with open(tmp_file, 'wb') as f:
+                f.write(encode_csv_rows([columns.row(pos) for pos in positions]))
+                f.flush()
+                os.fsync(f.fileno())
+            replace_file(tmp_file, path)
+            totals = source.rollup.get("" if key == self.UNDATED else key, {})
+            partitions[key] = {"rows": len(positions), "min_id": columns.ids[positions[0]],
+                               "max_id": columns.ids[positions[-1]], "bytes": os.path.getsize(path),
+                               "totals": {typ: dict(totals.get(typ, {})) for typ in ("Income", "Expense")}}
+        # the manifest is written last, so an interrupted migration simply runs again
+        self.manifest = {"format": self.FORMAT, "next_id": source.next_id, "partitions": partitions,
+                         "migrated_from": os.path.basename(self.data_file)}
+        self.save_manifest()
+
+    # Partitions with an unreplayed write-ahead log, or whose size no longer matches
+    # the manifest, are opened (which replays the log) and described again.
+    def recover(self):
+        stale = []
+        for name in os.listdir(self.directory):
+            key, ext = os.path.splitext(name)
+            path = os.path.join(self.directory, name)
+            info = self.manifest["partitions"].get(key)
+            if ext == ".wal" and os.path.getsize(path):
+                stale.append(key)
+            elif ext == ".csv" and (info is None or info.get("bytes", os.path.getsize(path)) != os.path.getsize(path)):
+                stale.append(key)
+        for key in set(stale):
+            self._update(key, self.partition(key, create=True))
+        if stale: self.save_manifest()
+
+    def close(self):
+        with self._lock:
+            for ledger in self.partitions.values():
+                ledger.close()
+
+    # --- Partitions ---
+    def partition(self, key, create=False):
+        with self._lock:
+            ledger = self.partitions.get(key)
+            if ledger is None:
+                path = os.path.join(self.directory, key + ".csv")
+                if not create and not os.path.exists(path): return None
+                with PROFILER.span("partitions.open", partition=key):
+                    ledger = self.partitions[key] = CsvLedger(path, self.durability)
+            return ledger
+
+    def keys_for_period(self, period, query=None):
+        keys = sorted(k for k, info in self.manifest["partitions"].items() if info["rows"] and k != self.UNDATED)
+        if self.UNDATED in self.manifest["partitions"]: keys.append(self.UNDATED)
+        if period and period != "All Periods": keys = [k for k in keys if k == period]
+        if query is not None and (query.start or query.end):
+            # prune months outside the query's date range; undated rows cannot match one
+            keys = [k for k in keys if k != self.UNDATED and
+                    (query.start is None or k >= query.start[:7]) and (query.end is None or k + "-01" < query.end)]
+        return keys
+
+    def _update(self, key, ledger):
+        self.manifest["partitions"][key] = self._describe(ledger)
+        self.manifest["next_id"] = max(self.manifest["next_id"], ledger.next_id)
+
+    # --- Ledger interface ---
+    def periods(self):
+        with self._lock:
+            return sorted((k for k, info in self.manifest["partitions"].items() if info["rows"] and k != self.UNDATED),
+                          reverse=True)
+
+    def fetch(self, period):
+        ids, rows = [], []
+        for chunk_ids, chunk_rows, _ in self.iter_fetch(period, 50000):
+            ids.extend(chunk_ids)
+            rows.extend(chunk_rows)
+        return ids, rows
+
+    def iter_fetch(self, period, chunk_size):
+        with self._lock:
+            keys = self.keys_for_period(period)
+        for key in keys:
+            ledger = self.partition(key)
+            if ledger is not None: yield from ledger.iter_fetch("All Periods", chunk_size)
+
+    def iter_search(self, period, query, chunk_size):
+        with self._lock:
+            keys = self.keys_for_period(period, query)
+        for key in keys:
+            ledger = self.partition(key)
+            if ledger is not None: yield from ledger.iter_search("All Periods", query, chunk_size)
+
+    @PROFILER.timed("ledger.totals")
+    def totals(self, period):
+        income_paise, expense_paise = {}, {}
+        with self._lock:
+            infos = [self.manifest["partitions"][k] for k in self.keys_for_period(period)]
+        for info in infos:
+            for typ, target in (("Income", income_paise), ("Expense", expense_paise)):
+                for cat, paise in info["totals"].get(typ, {}).items():
+                    target[cat] = target.get(cat, 0) + paise
+        income_paise = {k: v for k, v in income_paise.items() if v}
+        expense_paise = {k: v for k, v in expense_paise.items() if v}
+        return ({k: v / 100 for k, v in income_paise.items()}, {k: v / 100 for k, v in expense_paise.items()},
+                sum(income_paise.values()) / 100, sum(expense_paise.values()) / 100)
+
+    # (month ordinal, is income, category, paise) per partition and category, straight from the manifest
+    def monthly_cells(self):
+        with self._lock:
+            items = list(self.manifest["partitions"].items())
+        for key, info in items:
+            if key == self.UNDATED: continue
+            month = int(key[:4]) * 12 + int(key[5:]) - 1
+            for typ in ("Income", "Expense"):
+                for cat, paise in info["totals"].get(typ, {}).items():
+                    yield month, typ == "Income", cat, paise
+
+    def append(self, row):
+        return self.append_many([row])[0]
+
+    @PROFILER.timed("ledger.append")
+    def append_many(self, rows):
+        with self._lock:
+            self.refresh()
+            rows = list(rows)
+            first = self.manifest["next_id"]
+            ids = list(range(first, first + len(rows)))
+            groups = {}
+            for row_id, row in zip(ids, rows):
+                groups.setdefault(self.partition_key(row[0]), ([], []))
+                groups[self.partition_key(row[0])][0].append(row_id)
+                groups[self.partition_key(row[0])][1].append(row)
+            self.manifest["next_id"] = first + len(rows)
+            for key, (group_ids, group_rows) in groups.items():
+                ledger = self.partition(key, create=True)
+                ledger.append_many(group_rows, ids=group_ids)
+                self._update(key, ledger)
+            if rows:
+                self.save_manifest()
+                self.version += 1
+            return ids
+
+    @PROFILER.timed("ledger.delete")
+    def delete(self, ids):
+        with self._lock:
+            remaining = set(ids)
+            for key, info in list(self.manifest["partitions"].items()):
+                if not remaining: break
+                if info["min_id"] is None or not any(info["min_id"] <= i <= info["max_id"] for i in remaining): continue
+                ledger = self.partition(key)
+                if ledger is None: continue
+                found = [i for i in remaining if ledger.columns.position(i) is not None]
+                if not found: continue
+                ledger.delete(found)
+                remaining.difference_update(found)
+                self._update(key, ledger)
+            if len(remaining) < len(set(ids)):
+                self.save_manifest()
+                self.version += 1
+
+    def transaction_keys(self):
+        with self._lock:
+            keys = self.keys_for_period("All Periods")
+        result = []
+        for key in keys:
+            ledger = self.partition(key)
+            if ledger is not None: result.extend(ledger.transaction_keys())
+        return result
+
+    # every write, from any process, ends by saving the manifest
+    def watch_paths(self):
+        return [self.manifest_file]
+
+    def refresh(self):
+        with self._lock:
+            changed = False
+            stamp = os.stat(self.manifest_file).st_mtime_ns if os.path.exists(self.manifest_file) else None
+            if stamp != self._manifest_stamp:
+                changed = self.load_manifest()
+            for key, ledger in list(self.partitions.items()):
+                if ledger.refresh():
+                    self._update(key, ledger)
+                    changed = True
+            if changed: self.version += 1
+            return changed
+
+# --- SQLite Ledger (indexed; filtering and grouping run in SQL) ---
+class SqliteLedger:
+    # amounts are stored as signed integer paise, as the ledger writes them, so sums are exact
+    ROW_PAISE = "CASE WHEN {0}type = 'Income' THEN {0}amount_paise ELSE ABS({0}amount_paise) END"
+    TABLE_SQL = """
+        CREATE TABLE {} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            datetime TEXT NOT NULL,
+            amount_paise INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            type TEXT NOT NULL,
+            note TEXT NOT NULL DEFAULT ''
+        )"""
+
+    def __init__(self, db_file, csv_file=None, durability=None):
+        self.db_file = db_file
+        self.durability = durability or Durability()
+        self.version = 0
+        self._local = threading.local()
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute(self.TABLE_SQL.format("IF NOT EXISTS transactions"))
+        self._migrate_amounts()
+        self.conn.executescript("""
+            CREATE INDEX IF NOT EXISTS idx_transactions_datetime ON transactions(datetime);
+            CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type);
+            CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category);
+            CREATE INDEX IF NOT EXISTS idx_transactions_amount ON transactions(ABS(amount_paise));
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.has_fts = self._create_note_index()
+        self._create_period_totals()
+        self.csv_file = csv_file
+        self._csv_stamp = None # (size, mtime) of the CSV when its tail was last read
+        if csv_file: self.import_csv(csv_file)
+        self._version_conn = None
+        self._version_lock = threading.Lock()
+        self._seen_version = self._data_version()
+
+    # FTS5 index over notes, kept in step with the table by triggers; LIKE is the fallback without FTS5
+    def _create_note_index(self):
+        exists = self.conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").fetchone()
+        try:
+            self.conn.executescript("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5(note, content='transactions', content_rowid='id');
+                CREATE TRIGGER IF NOT EXISTS transactions_fts_insert AFTER INSERT ON transactions BEGIN
+                    INSERT INTO notes_fts (rowid, note) VALUES (new.id, new.note);
+                END;
+                CREATE TRIGGER IF NOT EXISTS transactions_fts_delete AFTER DELETE ON transactions BEGIN
+                    INSERT INTO notes_fts (notes_fts, rowid, note) VALUES ('delete', old.id, old.note);
+                END;
+                CREATE TRIGGER IF NOT EXISTS transactions_fts_update AFTER UPDATE OF note ON transactions BEGIN
+                    INSERT INTO notes_fts (notes_fts, rowid, note) VALUES ('delete', old.id, old.note);
+                    INSERT INTO notes_fts (rowid, note) VALUES (new.id, new.note);
+                END;
+            """)
+        except sqlite3.OperationalError: # SQLite built without FTS5
+            return False
+        if not exists:
+            with self.conn:
+                self.conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild')")
+        return True
+
+    # Databases that kept amounts as REAL rupees are rebuilt once with amount_paise;
+    # IDs and the AUTOINCREMENT counter carry over, and the summary table is refilled.
+    def _migrate_amounts(self):
+        conn = self.conn
+        columns = lambda: [info[1] for info in conn.execute("PRAGMA table_info(transactions)")]
+        if "amount_paise" in columns(): return
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if "amount_paise" in columns(): return
+            seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+            conn.execute("DROP TABLE IF EXISTS period_totals")
+            conn.execute(self.TABLE_SQL.format("transactions_paise"))
+            conn.execute("INSERT INTO transactions_paise (id, datetime, amount_paise, category, type, note)"
+                         " SELECT id, datetime, CAST(ROUND(amount * 100) AS INTEGER), category, type, note FROM transactions")
+            conn.execute("DROP TABLE transactions")
+            conn.execute("ALTER TABLE transactions_paise RENAME TO transactions")
+            if seq: conn.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'transactions'", seq)
+
+    # (datetime, paise, category, type, note) for a ledger row; an unreadable amount counts as zero
+    @staticmethod
+    def _record(row):
+        paise = parse_paise(row[1])
+        return row[0], 0 if paise is None else paise, row[2], row[3], row[4]
+
+    # Paise and row counts per (period, type, category), kept in step with the table by
+    # triggers like the note index, so periods() and totals() never scan transactions.
+    # The table, its triggers and the first fill are created in one transaction.
+    def _create_period_totals(self):
+        conn = self.conn
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'period_totals'").fetchone(): return
+        new, old = self.ROW_PAISE.format("new."), self.ROW_PAISE.format("old.")
+        add = f"""
+            INSERT INTO period_totals (period, income, category, paise, rows)
+            VALUES (substr(new.datetime, 1, 7), new.type = 'Income', new.category, {new}, 1)
+            ON CONFLICT (period, income, category) DO UPDATE SET paise = paise + excluded.paise, rows = rows + 1;"""
+        remove = f"""
+            UPDATE period_totals SET paise = paise - {old}, rows = rows - 1
+            WHERE period = substr(old.datetime, 1, 7) AND income = (old.type = 'Income') AND category = old.category;
+            DELETE FROM period_totals
+            WHERE period = substr(old.datetime, 1, 7) AND income = (old.type = 'Income') AND category = old.category AND rows = 0;"""
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'period_totals'").fetchone(): return
+            conn.execute("""
+                CREATE TABLE period_totals (
+                    period TEXT NOT NULL,
+                    income INTEGER NOT NULL,
+                    category TEXT NOT NULL,
+                    paise INTEGER NOT NULL,
+                    rows INTEGER NOT NULL,
+                    PRIMARY KEY (period, income, category)
+                )""")
+            conn.execute("CREATE TRIGGER transactions_totals_insert AFTER INSERT ON transactions BEGIN" + add + " END")
+            conn.execute("CREATE TRIGGER transactions_totals_delete AFTER DELETE ON transactions BEGIN" + remove + " END")
+            conn.execute("CREATE TRIGGER transactions_totals_update AFTER UPDATE OF datetime, amount_paise, category, type"
+                         " ON transactions BEGIN" + remove + add + " END")
+            conn.execute("INSERT INTO period_totals SELECT substr(datetime, 1, 7), type = 'Income', category, SUM(" +
+                         self.ROW_PAISE.format("") + "), COUNT(*) FROM transactions GROUP BY 1, 2, 3")
+
+    # one connection per thread, so background readers never share the GUI's cursor
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file)
+            # FULL syncs the WAL on every commit; NORMAL leaves it to checkpoints
+            conn.execute("PRAGMA synchronous = " + ("NORMAL" if self.durability.mode == "periodic" else "FULL"))
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        with self._version_lock:
+            if self._version_conn is not None: self._version_conn.close()
+            self._version_conn = None
+
+    # finance_data.csv is imported once; after that only rows appended to it (by a
+    # sync tool, say) are read, from the byte offset recorded in meta
+    @PROFILER.timed("sqlite.import_csv")
+    def import_csv(self, csv_file):
+        if self.conn.execute("SELECT 1 FROM meta WHERE key = 'csv_imported'").fetchone():
+            self.import_csv_tail()
+            return
+        offset = self._complete_size(csv_file)
+        if os.path.exists(csv_file):
+            # the CSV ledger's live rows and IDs, with its journal and write-ahead log applied
+            columns = CsvLedger(csv_file, read_only=True).columns
+            rows = ((columns.ids[pos],) + self._record(columns.row(pos)) for pos in range(len(columns)) if columns.alive[pos])
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO transactions (id, datetime, amount_paise, category, type, note)"
+                    " VALUES (?, ?, ?, ?, ?, ?)", rows)
+        with self.conn:
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('csv_imported', ?)", (csv_file,))
+            self._save_csv_offset(csv_file, offset)
+
+    # the offset comes with a fingerprint of the bytes before it, so a rewritten CSV is told from an appended one
+    def _save_csv_offset(self, csv_file, offset):
+        self.conn.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                              [("csv_offset", str(offset)), ("csv_fingerprint", tail_fingerprint(csv_file, offset))])
+
+    # bytes up to the end of the last complete line
+    @staticmethod
+    def _complete_size(path):
+        if not os.path.exists(path): return 0
+        with open(path, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+        return size - len(tail) + tail.rfind(b"\n") + 1
+
+    # Rows appended to the CSV get fresh IDs here, since the CSV's own may be taken.
+    # The offset is read and moved inside one write transaction, so two processes
+    # never import the same rows; a CSV that was rewritten (it shrank, or the bytes
+    # before the offset changed) is not re-read.
+    @PROFILER.timed("sqlite.import_csv_tail")
+    def import_csv_tail(self):
+        if not self.csv_file or not os.path.exists(self.csv_file): return False
+        st = os.stat(self.csv_file)
+        size = st.st_size
+        if (size, st.st_mtime_ns) == self._csv_stamp: return False
+        conn = self.conn
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            saved = dict(conn.execute("SELECT key, value FROM meta WHERE key IN ('csv_offset', 'csv_fingerprint')"))
+            offset = int(saved["csv_offset"]) if "csv_offset" in saved else None
+            rows = []
+            if offset is None or size < offset or tail_fingerprint(self.csv_file, offset) != saved.get("csv_fingerprint"):
+                offset = self._complete_size(self.csv_file)
+            elif size > offset:
+                with open(self.csv_file, 'rb') as f:
+                    f.seek(offset)
+                    data = f.read(size - offset)
+                data = data[:data.rfind(b"\n") + 1] # a half-written last line is read next time
+                rows = [self._record(row) for row in csv.reader(io.StringIO(data.decode(FILE_ENCODING, errors="replace"), newline=''))
+                        if len(row) >= 5]
+                conn.executemany("INSERT INTO transactions (datetime, amount_paise, category, type, note) VALUES (?, ?, ?, ?, ?)",
+                                 rows)
+                offset += len(data)
+            self._save_csv_offset(self.csv_file, offset)
+        self._csv_stamp = (size, st.st_mtime_ns)
+        return bool(rows)
+
+    # Half-open datetime range covering one YYYY-MM period, so the datetime index is used
+    @staticmethod
+    def _period_clause(period):
+        if period == "All Periods" or not period: return "", ()
+        year, month = int(period[:4]), int(period[5:7])
+        upper = f"{year + month // 12:04d}-{month % 12 + 1:02d}"
+        return " WHERE datetime >= ? AND datetime < ?", (period, upper)
+
+    def periods(self):
+        periods = self.conn.execute("SELECT DISTINCT period FROM period_totals ORDER BY 1 DESC").fetchall()
+        return [p for (p,) in periods if CsvLedger.period_key(p)]
+
+    def fetch(self, period):
+        ids, rows = [], []
+        for chunk_ids, chunk_rows, _ in self.iter_fetch(period, 10000):
+            ids.extend(chunk_ids)
+            rows.extend(chunk_rows)
+        return ids, rows
+
+    def iter_fetch(self, period, chunk_size):
+        where, params = self._period_clause(period)
+        return self._iter_select(where, params, chunk_size)
+
+    def iter_search(self, period, query, chunk_size):
+        where, params = self._period_clause(period)
+        conditions, params = ([where[len(" WHERE "):]] if where else []), list(params)
+        if query.type is not None:
+            conditions.append("type = ?")
+            params.append(query.type)
+        if query.categories is not None:
+            conditions.append(f"category IN ({', '.join('?' * len(query.categories))})")
+            params.extend(sorted(query.categories))
+        if query.min_paise is not None:
+            conditions.append("ABS(amount_paise) >= ?")
+            params.append(query.min_paise)
+        if query.max_paise is not None:
+            conditions.append("ABS(amount_paise) <= ?")
+            params.append(query.max_paise)
+        if query.start is not None:
+            conditions.append("datetime >= ?")
+            params.append(query.start)
+        if query.end is not None:
+            conditions.append("datetime < ?")
+            params.append(query.end)
+        if query.words and self.has_fts:
+            conditions.append("id IN (SELECT rowid FROM notes_fts WHERE notes_fts MATCH ?)")
+            params.append(" ".join(f'"{word}"*' for word in query.words))
+        elif query.words:
+            for word in query.words:
+                conditions.append("note LIKE ?")
+                params.append(f"%{word}%")
+        where = " WHERE " + " AND ".join(conditions) if conditions else ""
+        return self._iter_select(where, params, chunk_size)
+
+    def _iter_select(self, where, params, chunk_size):
+        cursor = self.conn.execute(
+            "SELECT id, datetime, amount_paise, category, type, note FROM transactions" + where + " ORDER BY id", params)
+        while True:
+            batch = cursor.fetchmany(chunk_size)
+            if not batch: return
+            rows = [[dt, format_paise(paise), cat, typ, note, str(rowid)] for rowid, dt, paise, cat, typ, note in batch]
+            net = sum(paise if typ == "Income" else -abs(paise) for _, _, paise, _, typ, _ in batch)
+            yield [rowid for rowid, *_ in batch], rows, net / 100
+
+    @PROFILER.timed("ledger.totals")
+    def totals(self, period):
+        income_paise, expense_paise = {}, {}
+        where, params = ("", ()) if period == "All Periods" or not period else (" WHERE period = ?", (period,))
+        for income, cat, total in self.conn.execute(
+                "SELECT income, category, SUM(paise) FROM period_totals" + where + " GROUP BY 1, 2", params):
+            if not total: continue
+            (income_paise if income else expense_paise)[cat] = total
+        return ({k: v / 100 for k, v in income_paise.items()}, {k: v / 100 for k, v in expense_paise.items()},
+                sum(income_paise.values()) / 100, sum(expense_paise.values()) / 100)
+
+    # (month ordinal, is income, category, paise) per month and category, like PartitionedLedger's
+    def monthly_cells(self):
+        for key, income, cat, paise in self.conn.execute(
+                "SELECT period, income, category, paise FROM period_totals WHERE paise != 0"):
+            if CsvLedger.period_key(key) is None: continue
+            yield int(key[:4]) * 12 + int(key[5:]) - 1, bool(income), cat, paise
+
+    def append(self, row):
+        return self.append_many([row])[0]
+
+    @PROFILER.timed("ledger.append")
+    def append_many(self, rows):
+        ids = []
+        with self.conn:
+            for row in rows:
+                ids.append(self.conn.execute(
+                    "INSERT INTO transactions (datetime, amount_paise, category, type, note) VALUES (?, ?, ?, ?, ?)",
+                    self._record(row)).lastrowid)
+        self._seen_version = self._data_version()
+        self.version += 1
+        return ids
+
+    def transaction_keys(self):
+        return [transaction_key([dt, format_paise(paise), cat, typ, note])
+                for dt, paise, cat, typ, note in self.conn.execute(
+                    "SELECT datetime, amount_paise, category, type, note FROM transactions")]
+
+    # data_version on one dedicated connection changes with every commit made through
+    # any other; the baseline moves past our own commits right after they are made
+    def _data_version(self):
+        with self._version_lock:
+            if self._version_conn is None:
+                self._version_conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            return self._version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def watch_paths(self):
+        return [self.db_file, self.db_file + "-wal"] + ([self.csv_file] if self.csv_file else [])
+
+    def refresh(self):
+        self.import_csv_tail()
+        data_version = self._data_version()
+        if data_version == self._seen_version: return False
+        self._seen_version = data_version
+        self.version += 1
+        return True
+
+    @PROFILER.timed("ledger.delete")
+    def delete(self, keys):
+        with self.conn:
+            self.conn.executemany("DELETE FROM transactions WHERE id = ?", [(k,) for k in keys])
+        self._seen_version = self._data_version()
+        self.version += 1
+
+# --- Vectorized Aggregation Engine ---
+# Holds the ledger as NumPy columns (int64 paise, month ordinals) and answers
+# the monthly trend with bincount instead of Python loops over the rows. Sums
+# stay in exact paise until they are returned.
+class AggregationEngine:
+    def __init__(self, paise, is_income, month):
+        import numpy as np
+        self.np = np
+        self.paise = paise
+        self.is_income = is_income
+        self.month = month
+
+    # The CSV ledger already keeps typed columns, so they are copied straight into NumPy
+    @classmethod
+    def from_columns(cls, columns, lock):
+        import numpy as np
+        with lock: # appends to an array with exported buffers would fail, so copy under the ledger's lock
+            n = len(columns)
+            keep = np.frombuffer(columns.alive, dtype=np.uint8, count=n).astype(bool)
+            keep &= np.frombuffer(columns.month, dtype=np.int32, count=n) >= 0
+            paise = np.frombuffer(columns.paise, dtype=np.int64, count=n)[keep]
+            month = np.frombuffer(columns.month, dtype=np.int32, count=n)[keep].astype(np.int64)
+            is_income = np.frombuffer(columns.type, dtype=np.uint8, count=n)[keep] == columns.INCOME
+        valid = paise != TransactionColumns.INVALID
+        paise, month, is_income = paise[valid], month[valid], is_income[valid]
+        return cls(np.where(is_income, paise, np.abs(paise)), is_income, month)
+
+    # pre-summed (month, is income, category, paise) cells; bincount gives the same sums as for single rows
+    @classmethod
+    def from_cells(cls, cells):
+        import numpy as np
+        cells = list(cells)
+        is_income = np.array([c[1] for c in cells], dtype=bool)
+        paise = np.array([c[3] for c in cells], dtype=np.int64)
+        return cls(paise, is_income, np.array([c[0] for c in cells], dtype=np.int64))
+
+    # CSV ledgers hand over their columns; the others their per-month totals
+    @classmethod
+    @PROFILER.timed("aggregate.engine")
+    def from_ledger(cls, ledger):
+        if isinstance(ledger, CsvLedger):
+            return cls.from_columns(ledger.columns, ledger._lock)
+        return cls.from_cells(ledger.monthly_cells())
+
+    @staticmethod
+    def month_labels(first, count):
+        return [f"{(first + i) // 12:04d}-{(first + i) % 12 + 1:02d}" for i in range(count)]
+
+    def _month_offsets(self):
+        first = int(self.month.min())
+        offsets = self.month - first
+        return first, offsets, int(offsets.max()) + 1
+
+    def _sum_paise(self, bins, count):
+        np = self.np
+        income = np.bincount(bins, weights=np.where(self.is_income, self.paise, 0), minlength=count)
+        expense = np.bincount(bins, weights=np.where(self.is_income, 0, self.paise), minlength=count)
+        # bincount sums in float64, which is exact for totals below 2**53 paise
+        return np.rint(income).astype(np.int64), np.rint(expense).astype(np.int64)
+
+    def _monthly_paise(self):
+        np = self.np
+        if not len(self.month): return [], np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        first, offsets, count = self._month_offsets()
+        income, expense = self._sum_paise(offsets, count)
+        return self.month_labels(first, count), income, expense
+
+    # -> (["YYYY-MM", ...], income per month, expense per month) in rupees, gaps filled with zeros
+    def monthly(self):
+        months, income, expense = self._monthly_paise()
+        return months, income / 100, expense / 100
+
+# --- Virtualized Table Model (cells are produced on demand by the view) ---
+class TransactionTableModel(QAbstractTableModel):
+    HEADERS = ["Date/Time", "Amount", "Category", "Type", "Note"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.chunks = [] # sequences of rows as they arrived (lists or ColumnRows views)
+        self.starts = [] # index of each chunk's first row
+        self.count = 0
+        self.income_brush = QBrush(QColor("#66BB6A"))
+        self.expense_brush = QBrush(QColor("#EF5350"))
+        self.amount_alignment = QVariant(int(Qt.AlignRight | Qt.AlignVCenter))
+
+    def set_rows(self, rows):
+        self.beginResetModel()
+        self.chunks, self.starts, self.count = ([rows], [0], len(rows)) if len(rows) else ([], [], 0)
+        self.endResetModel()
+
+    def append_rows(self, rows):
+        if not len(rows): return
+        start = self.count
+        self.beginInsertRows(QModelIndex(), start, start + len(rows) - 1)
+        self.chunks.append(rows)
+        self.starts.append(start)
+        self.count += len(rows)
+        self.endInsertRows()
+
+    def row(self, i):
+        chunk = bisect.bisect_right(self.starts, i) - 1
+        return self.chunks[chunk][i - self.starts[chunk]]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return QVariant()
+        col = index.column()
+
+        if role == Qt.DisplayRole:
+            return self.row(index.row())[col]
+        if role == Qt.ForegroundRole and col == 3: # Type column
+            typ = self.row(index.row())[3]
+            return self.income_brush if typ == "Income" else self.expense_brush
+        if role == Qt.TextAlignmentRole and col == 1: # Amount column
+            return self.amount_alignment
+        return QVariant()
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole: return QVariant()
+        if orientation == Qt.Horizontal: return self.HEADERS[section]
+        return str(section + 1)
+
+# --- Budgets (saifu_config.json "budgets": {expense category: monthly limit in ₹}) ---
+# BudgetTracker keeps this month's spend per expense category in paise. It is
+# seeded from ledger.totals(month), which every backend answers from its rollup,
+# manifest or index, and after that each saved or deleted row moves one counter,
+# so alerts and the Budgets tab never rescan the history. Writes made by other
+# processes reseed it when the watcher reports them. An alert fires when a change
+# carries a category across one of the "budget_alerts" fractions of its limit.
+def current_month():
+    return datetime.date.today().strftime("%Y-%m")
+
+class BudgetTracker:
+    def __init__(self, budgets, alert_levels=(0.8, 1.0)):
+        self.limits = {} # category -> paise
+        for cat, limit in budgets.items():
+            self.set_limit(cat, parse_paise(str(limit)))
+        self.alert_levels = sorted(alert_levels)
+        self.month = None # "YYYY-MM" the counters belong to; None until seeded
+        self.spent = {} # category -> paise spent in self.month
+
+    def set_limit(self, cat, paise):
+        if cat not in EXPENSE_CATEGORIES: return
+        if paise: self.limits[cat] = paise
+        else: self.limits.pop(cat, None)
+
+    # the limits as they are written to saifu_config.json
+    def budgets(self):
+        return {cat: paise / 100 if paise % 100 else paise // 100 for cat, paise in self.limits.items()}
+
+    # expense is {category: rupees} as ledger.totals returns it; -> alerts for limits the new totals crossed
+    def seed(self, month, expense):
+        spent = {cat: round(amount * 100) for cat, amount in expense.items()}
+        alerts = []
+        if month == self.month:
+            for cat, paise in spent.items():
+                alerts += self._crossed(cat, self.spent.get(cat, 0), paise)
+        self.month, self.spent = month, spent
+        return alerts
+
+    # sign is 1 for saved rows and -1 for deleted ones; rows outside the tracked month are ignored
+    def record(self, rows, sign=1):
+        if self.month is None: return []
+        changes = {}
+        for row in rows:
+            if row[3] == "Expense" and row[0][:7] == self.month:
+                changes[row[2]] = changes.get(row[2], 0) - sign * signed_paise(row)
+        alerts = []
+        for cat, delta in changes.items():
+            before = self.spent.get(cat, 0)
+            self.spent[cat] = before + delta
+            alerts += self._crossed(cat, before, before + delta)
+        return alerts
+
+    def _crossed(self, cat, before, after):
+        limit = self.limits.get(cat)
+        if not limit: return []
+        levels = [level for level in self.alert_levels if before < level * limit <= after]
+        if not levels: return []
+        used = f"₹{after / 100:,.2f} of ₹{limit / 100:,.2f} ({after * 100 // limit}%)"
+        return [f"{cat} is over budget: {used}" if levels[-1] >= 1 else f"{cat} has used {used}"]
+
+class BudgetTableModel(QAbstractTableModel):
+    HEADERS = ["Category", "Budget", "Spent", "Remaining", "Used"]
+    budgets_changed = pyqtSignal()
+
+    def __init__(self, tracker, parent=None):
+        super().__init__(parent)
+        self.tracker = tracker
+        self.over_brush = QBrush(QColor("#EF5350"))
+        self.warn_brush = QBrush(QColor("#FFA726"))
+        self.ok_brush = QBrush(QColor("#66BB6A"))
+        self.amount_alignment = QVariant(int(Qt.AlignRight | Qt.AlignVCenter))
+
+    def refresh(self):
+        self.dataChanged.emit(self.index(0, 0), self.index(self.rowCount() - 1, self.columnCount() - 1))
+
+    # -> (label, limit or None, spent) in paise; the last row is the total
+    def cells(self, row):
+        tracker = self.tracker
+        if row < len(EXPENSE_CATEGORIES):
+            cat = EXPENSE_CATEGORIES[row]
+            return cat, tracker.limits.get(cat), tracker.spent.get(cat, 0)
+        return "Total", sum(tracker.limits.values()) or None, sum(tracker.spent.values())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(EXPENSE_CATEGORIES) + 1
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return QVariant()
+        col = index.column()
+        label, limit, spent = self.cells(index.row())
+
+        if role == Qt.EditRole and col == 1:
+            return format_paise(limit) if limit else ""
+        if role == Qt.DisplayRole:
+            if col == 0: return label
+            if col == 2: return f"₹{spent / 100:,.2f}"
+            if not limit: return "—" if col == 1 else ""
+            if col == 1: return f"₹{limit / 100:,.2f}"
+            if col == 3: return f"₹{(limit - spent) / 100:,.2f}"
+            return f"{spent * 100 // limit}%"
+        if role == Qt.ForegroundRole and col >= 3 and limit:
+            if spent > limit: return self.over_brush
+            return self.warn_brush if spent >= self.tracker.alert_levels[0] * limit else self.ok_brush
+        if role == Qt.TextAlignmentRole and col > 0:
+            return self.amount_alignment
+        return QVariant()
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.column() == 1 and index.row() < len(EXPENSE_CATEGORIES): flags |= Qt.ItemIsEditable
+        return flags
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not self.flags(index) & Qt.ItemIsEditable: return False
+        text = str(value).replace(",", "").replace("₹", "").strip()
+        paise = parse_paise(text) if text else 0
+        if paise is None or paise < 0: return False
+        self.tracker.set_limit(EXPENSE_CATEGORIES[index.row()], paise)
+        self.refresh() # the total row moves with it
+        self.budgets_changed.emit()
+        return True
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or orientation != Qt.Horizontal: return QVariant()
+        return self.HEADERS[section]
+
+# --- Background Tasks (run on QThreadPool, report back to the GUI over signals) ---
+class TaskSignals(QObject):
+    chunk = pyqtSignal(object)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    done = pyqtSignal()
+
+class LedgerTask(QRunnable):
+    def __init__(self, fn):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.fn = fn
+        self.signals = TaskSignals()
+        self.cancelled = threading.Event()
+
+    def emit_chunk(self, payload):
+        if not self.cancelled.is_set():
+            self.signals.chunk.emit(payload)
+
+    def run(self):
+        try:
+            with PROFILER.profiled():
+                result = self.fn(self)
+            if not self.cancelled.is_set():
+                self.signals.finished.emit(result)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        finally:
+            self.signals.done.emit()
+
+# --- Ledger Watcher (picks up writes made by other processes) ---
+# QFileSystemWatcher reports changes to the ledger's files; a burst of reports
+# is coalesced into one refresh() on the thread pool, which for CSV parses only
+# the appended tail. Until a report arrives nothing touches the disk. A file
+# replaced by rename drops out of the watch list, so the list is renewed on every
+# report, and the folder is watched while some file does not exist yet.
+class LedgerWatcher(QObject):
+    changed = pyqtSignal()
+
+    def __init__(self, ledger, run_task, parent=None):
+        super().__init__(parent)
+        self.ledger = ledger
+        self.run_task = run_task
+        self.task = None
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.schedule)
+        self.watcher.directoryChanged.connect(self.schedule)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(150)
+        self.timer.timeout.connect(self.check)
+        self.watch()
+
+    def watch(self):
+        paths = self.ledger.watch_paths()
+        wanted = {p for p in paths if os.path.exists(p)}
+        if len(wanted) < len(paths): wanted.update(os.path.dirname(os.path.abspath(p)) for p in paths)
+        watched = set(self.watcher.files() + self.watcher.directories())
+        if watched - wanted: self.watcher.removePaths(list(watched - wanted))
+        if wanted - watched: self.watcher.addPaths(list(wanted - watched))
+
+    def schedule(self, path=None):
+        self.timer.start()
+
+    def check(self):
+        self.watch()
+        if self.task is not None: # still reading the last change; look again once it is done
+            self.timer.start()
+            return
+        self.task = self.run_task(lambda task: self.ledger.refresh(), on_finished=self.on_refreshed, on_done=self.on_done)
+
+    def on_refreshed(self, changed):
+        if changed: self.changed.emit()
+
+    def on_done(self):
+        self.task = None
 
 class FinanceTrackerApp(QMainWindow):
+    LOAD_CHUNK_SIZE = 5000
+    TREND_MODES = ("Line: Monthly Income vs Expense", "Line: Running Balance")
+
+
     def __init__(self):
         super().__init__()
         self.setGeometry(50, 50, 1600, 900)
         self.setWindowTitle("SAIFU PAY")
         self.setFont(QFont("Segoe UI", 12))
         self.data_file = "finance_data.csv"
+        self.config = load_config()
+        self.ledger = None # opened in the background once the window is up
+        self.ledger_watcher = None
+        # until the ledger is open, the filters are filled from a quick scan of the CSV
+        self.period_scanner = PeriodScanner(self.data_file) if self.config.get("storage") == "csv" else None
+        self.scanned_periods = []
+        self.periods_cache = (None, None) # ((ledger, version), periods)
+        self.view_ids = []
+        self.view_total = 0.0
+        self.view_key = None # (ledger, version, period, search) the table was last loaded for
+        self.thread_pool = QThreadPool.globalInstance()
+        self.active_tasks = set()
+        self.open_task = None
+        self.load_task = None
+        self.chart_task = None
+        self.export_task = None
+        self.budgets = BudgetTracker(self.config.get("budgets") or {}, self.config.get("budget_alerts") or (0.8, 1.0))
+        self.chart_data_cache = OrderedDict() # (period or "trend", ledger version) -> chart data
+        self.bar_artists = None
+
+        # coalesce bursts of chart requests (tab switch + combo signals) into one redraw
+        self.chart_timer = QTimer(self)
+        self.chart_timer.setSingleShot(True)
+        self.chart_timer.setInterval(40)
+        self.chart_timer.timeout.connect(self.render_chart)
         
         # --- DEFINING CATEGORIES ---
-        self.INCOME_CATEGORIES = ["Salary", "Investment", "Freelance", "Gift", "Refund", "Other Income"]
-        self.EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Education", "Other Expense"]
+        self.INCOME_CATEGORIES = INCOME_CATEGORIES
+        self.EXPENSE_CATEGORIES = EXPENSE_CATEGORIES
 
         try:
             self.setWindowIcon(QIcon(r"C:\Users\Harigovind\Downloads\wallet.ico"))
@@ -42,7 +2385,88 @@ class FinanceTrackerApp(QMainWindow):
         self.stats_month_selector = QComboBox()
 
         self.init_ui()
+        if self.config.get("profile"): PROFILER.start()
+        if PROFILER.enabled:
+            self.profile_label = QLabel()
+            self.profile_label.setStyleSheet("font-size: 13px; color: #aaa;")
+            self.statusBar().addWidget(self.profile_label)
+            self.profile_timer = QTimer(self)
+            self.profile_timer.timeout.connect(lambda: self.profile_label.setText(PROFILER.summary()))
+            self.profile_timer.start(500)
+        QTimer.singleShot(0, self.open_ledger) # first load starts once the event loop (and window) is up
+
+    # --- Background loading ---
+    def run_task(self, fn, on_chunk=None, on_finished=None, on_done=None):
+        task = LedgerTask(fn)
+        if on_chunk is not None:
+            task.signals.chunk.connect(lambda payload: None if task.cancelled.is_set() else on_chunk(payload))
+        if on_finished is not None:
+            task.signals.finished.connect(lambda result: None if task.cancelled.is_set() else on_finished(result))
+        task.signals.failed.connect(self.on_task_failed)
+        task.signals.done.connect(lambda: self.active_tasks.discard(task))
+        if on_done is not None: task.signals.done.connect(on_done)
+        self.active_tasks.add(task)
+        self.thread_pool.start(task)
+        return task
+
+    # the period scan starts once the tail repair is done, while the ledger itself is still loading
+    def open_ledger(self):
+        self.set_busy(True)
+
+        def open_task(task):
+            if self.period_scanner is not None:
+                CsvLedger.repair(self.data_file)
+                task.emit_chunk(None)
+            return open_ledger(self.data_file, self.config)
+
+        self.open_task = self.run_task(PROFILER.timed("ledger.open")(open_task), on_chunk=self.start_period_scan,
+                                       on_finished=self.on_ledger_ready, on_done=self.update_busy)
+
+    def start_period_scan(self, _):
+        self.run_task(lambda task: self.period_scanner.periods(), on_finished=self.on_periods_scanned)
+
+    def on_ledger_ready(self, ledger):
+        self.ledger = ledger
+        self.ledger_watcher = LedgerWatcher(ledger, self.run_task, self)
+        self.ledger_watcher.changed.connect(self.on_ledger_changed)
+        self.ledger_watcher.schedule() # catches writes made while the ledger was opening
+        self.populate_filter_combo_boxes()
         self.load_transactions()
+        self.sync_budgets()
+        if self.tabs.currentIndex() == 2: self.generate_chart()
+
+    def on_ledger_changed(self):
+        self.sync_budgets()
+        self.populate_filter_combo_boxes()
+        index = self.tabs.currentIndex()
+        if index == 1: self.load_transactions()
+        elif index == 2: self.generate_chart()
+
+    def on_periods_scanned(self, periods):
+        if self.ledger is not None: return
+        self.scanned_periods = periods
+        self.populate_filter_combo_boxes()
+
+    def set_busy(self, busy):
+        self.busy_indicator.setVisible(busy)
+
+    # runs when a task ends however it ended, so a failed open or load never leaves the indicator on
+    def update_busy(self):
+        self.set_busy(any(task is not None and task in self.active_tasks and not task.cancelled.is_set()
+                          for task in (self.open_task, self.load_task)))
+
+    def on_task_failed(self, msg):
+        print(f"Background task failed: {msg}")
+        self.statusBar().showMessage(f"Error: {msg}" if self.ledger is not None else f"Could not open the ledger: {msg}")
+
+    def closeEvent(self, event):
+        for task in list(self.active_tasks):
+            task.cancelled.set()
+        if self.ledger is not None: self.ledger.close()
+        if PROFILER.enabled:
+            for path in PROFILER.export(datetime.datetime.now().strftime("saifu_profile_%Y%m%d_%H%M%S")):
+                print(f"Profile written to {path}")
+        super().closeEvent(event)
 
     def apply_dark_modern_theme(self):
         self.setStyleSheet("""
@@ -51,10 +2475,10 @@ class FinanceTrackerApp(QMainWindow):
             QTabBar::tab { background: #333; padding: 12px 20px; margin-right: 2px; border-top-left-radius: 4px; border-top-right-radius: 4px; }
             QTabBar::tab:selected { background: #555; font-weight: bold; }
             QLineEdit, QComboBox, QDateEdit, QTimeEdit { background-color: #2d2d2d; padding: 8px; border: 1px solid #555; border-radius: 4px; color: white; }
-            QTableWidget { background-color: #121212; gridline-color: #333; selection-background-color: #3d3d3d; }
+            QTableView { background-color: #121212; gridline-color: #333; selection-background-color: #3d3d3d; }
             QHeaderView::section:horizontal { background-color: #121212; color: white; padding: 8px; border: 1px solid #333; font-weight: bold; }
             QHeaderView::section:vertical { background-color: #1e1e1e; color: white; border: 1px solid #333; }
-            QTableWidget::item { background-color: #1e1e1e; color: white; padding: 5px; }
+            QTableView::item { background-color: #1e1e1e; color: white; padding: 5px; }
             QTableCornerButton::section { background-color: #1e1e1e; border: 1px solid #333; }
             QLabel { font-size: 18px; }
             
@@ -77,39 +2501,41 @@ class FinanceTrackerApp(QMainWindow):
         self.add_tab = QWidget()
         self.view_tab = QWidget()
         self.stats_tab = QWidget()
+        self.budget_tab = QWidget()
 
         self.tabs.addTab(self.add_tab, "➕ Add Transaction")
         self.tabs.addTab(self.view_tab, "📄 View Transactions")
         self.tabs.addTab(self.stats_tab, "📊 Statistics")
+        self.tabs.addTab(self.budget_tab, "🎯 Budgets")
 
         self.tabs.currentChanged.connect(self.on_tab_change)
 
         self.setup_add_tab()
         self.setup_view_tab()
-        self.setup_stats_tab()
+        self.setup_budget_tab()
+        self.stats_chart_canvas = None # Statistics tab is built when first opened
 
         main_layout.addWidget(self.tabs)
         main_widget.setLayout(main_layout)
         self.setCentralWidget(main_widget)
 
+    # the watcher keeps the ledger current, so an unchanged ledger costs no I/O here
     def on_tab_change(self, index):
         self.populate_filter_combo_boxes()
-        if index == 1: self.load_transactions()
-        elif index == 2: self.generate_chart()
+        if index == 1:
+            if self.view_key != self.current_view_key(): self.load_transactions()
+        elif index == 2:
+            if self.stats_chart_canvas is None: self.setup_stats_tab()
+            self.generate_chart()
+        elif index == 3:
+            if self.budgets.month != current_month(): self.sync_budgets()
+            self.show_budgets()
 
     def get_unique_filter_periods(self):
-        periods = set()
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                for row in csv.reader(f):
-                    if len(row) > 0 and row[0]:
-                        try:
-                            dt = datetime.datetime.strptime(row[0], "%Y-%m-%d %H:%M:%S")
-                            periods.add(dt.strftime("%Y-%m"))
-                        except ValueError:
-                            continue
-        sorted_periods = sorted(list(periods), reverse=True)
-        return ["All Periods"] + sorted_periods
+        if self.ledger is None: return ["All Periods"] + self.scanned_periods
+        key = (self.ledger, self.ledger.version)
+        if self.periods_cache[0] != key: self.periods_cache = (key, self.ledger.periods())
+        return ["All Periods"] + self.periods_cache[1]
 
     def create_filter_widget(self, cmb):
         h_layout = QHBoxLayout()
@@ -118,6 +2544,7 @@ class FinanceTrackerApp(QMainWindow):
         h_layout.addWidget(cmb)
         return h_layout
     
+    @PROFILER.timed("filters.populate")
     def populate_filter_combo_boxes(self):
         periods = self.get_unique_filter_periods()
         
@@ -242,18 +2669,36 @@ class FinanceTrackerApp(QMainWindow):
 
         filter_layout.addWidget(btn_apply_filter)
         layout.addLayout(filter_layout)
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search, e.g.  swiggy >500 2025 cat:food")
+        self.search_input.setClearButtonEnabled(True)
+        # results follow the typing, one query per pause
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(150)
+        self.search_timer.timeout.connect(self.load_transactions)
+        self.search_input.textChanged.connect(lambda _: self.search_timer.start())
+        layout.addWidget(self.search_input)
         
         self.lbl_balance = QLabel("Net Balance: ₹0.00")
         self.lbl_balance.setAlignment(Qt.AlignCenter)
         self.lbl_balance.setStyleSheet("font-size: 24px; font-weight: bold; margin: 10px;")
         layout.addWidget(self.lbl_balance)
 
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels(["Date/Time", "Amount", "Category", "Type", "Note"])
+        self.busy_indicator = QProgressBar()
+        self.busy_indicator.setRange(0, 0) # indeterminate
+        self.busy_indicator.setTextVisible(False)
+        self.busy_indicator.setFixedHeight(6)
+        self.busy_indicator.setVisible(False)
+        layout.addWidget(self.busy_indicator)
+
+        self.table_model = TransactionTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table.setSelectionBehavior(QTableWidget.SelectRows)
-        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
         
         self.table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         self.table.verticalHeader().setDefaultSectionSize(30)
@@ -277,6 +2722,7 @@ class FinanceTrackerApp(QMainWindow):
 
     # --- TAB 3: Statistics ---
     def setup_stats_tab(self):
+        load_matplotlib()
         layout = QVBoxLayout()
         
         controls = QHBoxLayout()
@@ -286,7 +2732,11 @@ class FinanceTrackerApp(QMainWindow):
         btn_refresh_chart = QPushButton("Refresh Chart")
         self.style_button(btn_refresh_chart, "#1565C0")
         
-        btn_refresh_chart.clicked.connect(self.generate_chart)
+        btn_refresh_chart.clicked.connect(self.refresh_chart)
+
+        self.btn_export_reports = QPushButton("Export Reports")
+        self.style_button(self.btn_export_reports, "#6A1B9A")
+        self.btn_export_reports.clicked.connect(self.export_reports)
         self.stats_month_selector.currentIndexChanged.connect(self.generate_chart)
         
         self.chart_selector = QComboBox()
@@ -295,12 +2745,14 @@ class FinanceTrackerApp(QMainWindow):
             "Pie: Total Income vs Expense", 
             "Pie: Expense Breakdown", 
             "Pie: Income Breakdown",
-            "Bar: Category Breakdown" 
+            "Bar: Category Breakdown",
+            *self.TREND_MODES
         ])
         self.chart_selector.currentIndexChanged.connect(self.generate_chart)
 
         controls.addWidget(self.chart_selector)
         controls.addWidget(btn_refresh_chart)
+        controls.addWidget(self.btn_export_reports)
         layout.addLayout(controls)
 
         title = QLabel("Financial Analytics")
@@ -309,6 +2761,7 @@ class FinanceTrackerApp(QMainWindow):
         layout.addWidget(title)
         
         self.stats_chart_canvas = MplCanvas(self, width=12, height=6)
+        self.stats_chart_canvas.mpl_connect('resize_event', lambda event: self.generate_chart())
         layout.addWidget(self.stats_chart_canvas)
 
 
@@ -316,19 +2769,21 @@ class FinanceTrackerApp(QMainWindow):
 
     # --- Save Transaction with LARGE Success Box ---
     def save_transaction(self):
+        if self.ledger is None:
+            QMessageBox.warning(self, "Please Wait", "Transactions are still loading.")
+            return
+
         amt = self.amount_input.text()
         cat = self.category_input.currentText()
         typ = self.type_input.currentText()
         note = self.note_input.text()
 
-        try:
-            val = float(amt)
-            if val <= 0: raise ValueError
-        except ValueError:
+        paise = parse_paise(amt)
+        if paise is None or paise <= 0:
             QMessageBox.warning(self, "Error", "Invalid Amount")
             return
 
-        final_amt = val if typ == "Income" else -val
+        final_amt = paise if typ == "Income" else -paise
         
         date_part = self.date_input.date()
         time_part = self.time_input.time()
@@ -336,8 +2791,11 @@ class FinanceTrackerApp(QMainWindow):
         
         selected_date_time = combined_datetime.toString("yyyy-MM-dd HH:mm:00")
 
-        with open(self.data_file, 'a', newline='') as f:
-            csv.writer(f).writerow([selected_date_time, f"{final_amt:.2f}", cat, typ, note])
+        row = [selected_date_time, format_paise(final_amt), cat, typ, note]
+        self.ledger.append(row)
+        if self.budgets.month != current_month(): self.sync_budgets()
+        alerts = self.budgets.record([row])
+        self.budget_model.refresh()
         
         self.amount_input.clear()
         self.note_input.clear()
@@ -375,218 +2833,802 @@ class FinanceTrackerApp(QMainWindow):
         """)
         msg_box.exec_()
         # ----------------------------------------
+        self.show_budget_alerts(alerts)
         
         self.load_transactions()
         self.populate_filter_combo_boxes()
 
+    def current_view_key(self):
+        ledger = self.ledger
+        return (ledger, ledger.version if ledger else None, self.view_month_selector.currentText(), self.search_input.text())
+
     def load_transactions(self):
-        self.table.setRowCount(0)
-        total = 0.0
-        
+        if self.ledger is None: return
+        if self.load_task is not None: self.load_task.cancelled.set()
+        self.view_key = self.current_view_key()
+
         selected_period = self.view_month_selector.currentText()
+        query = SearchQuery.parse(self.search_input.text())
+        ledger = self.ledger
+        self.view_ids = []
+        self.view_total = 0.0
+        self.table_model.set_rows([])
+        self.show_balance(0.0)
+        self.set_busy(True)
 
-        if not os.path.exists(self.data_file):
-            self.lbl_balance.setText(f"Net Balance: ₹0.00")
-            return
+        def stream(task):
+            if query.is_empty():
+                chunks = ledger.iter_fetch(selected_period, self.LOAD_CHUNK_SIZE)
+            else:
+                chunks = ledger.iter_search(selected_period, query, self.LOAD_CHUNK_SIZE)
+            net = 0.0
+            while not task.cancelled.is_set():
+                with PROFILER.span("ledger.fetch_chunk"):
+                    chunk = next(chunks, None)
+                if chunk is None: break
+                net += chunk[2]
+                task.emit_chunk(chunk)
+            if task.cancelled.is_set(): return None
+            if not query.is_empty(): return round(net, 2)
+            _, _, total_inc, total_exp = ledger.totals(selected_period)
+            return total_inc - total_exp
 
-        with open(self.data_file, 'r') as f:
-            rows = list(csv.reader(f))
-            
-            for row in rows:
-                if len(row) < 5: continue 
-                
-                date_time_str = row[0] 
-                match_period = (selected_period == "All Periods" or date_time_str.startswith(selected_period))
-                
-                if not match_period:
-                    continue
+        self.load_task = self.run_task(stream, on_chunk=self.on_transactions_chunk, on_finished=self.on_transactions_loaded,
+                                       on_done=self.update_busy)
 
-                idx = self.table.rowCount()
-                self.table.insertRow(idx)
-                
-                try: 
-                    val = float(row[1])
-                    total += val
-                except: 
-                    pass
-
-                for i, d in enumerate(row):
-                    item = QTableWidgetItem(d)
-                    
-                    if i == 3: # Type column
-                        item.setForeground(QBrush(QColor("#66BB6A" if d == "Income" else "#EF5350")))
-                    
-                    if i == 1: # Amount column
-                        item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                        
-                    self.table.setItem(idx, i, item)
+    @PROFILER.timed("table.populate")
+    def on_transactions_chunk(self, payload):
+        ids, rows, chunk_total = payload
+        self.view_ids.extend(ids)
+        self.table_model.append_rows(rows)
+        self.view_total += chunk_total
+        self.show_balance(self.view_total)
 
+    def on_transactions_loaded(self, total):
+        self.set_busy(False)
+        self.show_balance(total)
+
+    def show_balance(self, total):
         self.lbl_balance.setText(f"Net Balance: ₹{total:,.2f}")
         color = "#66BB6A" if total >= 0 else "#EF5350"
         self.lbl_balance.setStyleSheet(f"font-size: 24px; font-weight: bold; margin: 10px; color: {color};")
 
     def generate_chart(self):
-        self.stats_chart_canvas.fig.clear()
-        
-        selected_period = self.stats_month_selector.currentText()
+        self.chart_timer.start() # (re)starts the debounce window
+
+    def refresh_chart(self):
+        if self.stats_chart_canvas is None: return
+        self.chart_data_cache.clear()
+        self.stats_chart_canvas.frames.clear()
+        self.stats_chart_canvas.shown_key = None
+        self.generate_chart()
 
-        income_map = {}
-        expense_map = {}
-        total_inc = 0
-        total_exp = 0
-
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                for row in csv.reader(f):
-                    if len(row) < 5: continue 
-                    
-                    date_time_str = row[0] 
-                    match_period = (selected_period == "All Periods" or date_time_str.startswith(selected_period))
-                    
-                    if not match_period:
-                        continue
-                    
-                    try:
-                        amt = float(row[1])
-                        cat = row[2]
-                        typ = row[3]
-                        
-                        if typ == "Income":
-                            total_inc += amt
-                            income_map[cat] = income_map.get(cat, 0) + amt
-                        else:
-                            abs_amt = abs(amt)
-                            total_exp += abs_amt
-                            expense_map[cat] = expense_map.get(cat, 0) + abs_amt
-                    except: continue
+    def render_chart(self):
+        if self.ledger is None or self.stats_chart_canvas is None: return
+        if self.chart_task is not None: self.chart_task.cancelled.set()
 
+        selected_period = self.stats_month_selector.currentText()
         mode = self.chart_selector.currentText()
+        ledger = self.ledger
+        frame_key = (selected_period, mode, ledger.version, self.stats_chart_canvas.get_width_height())
+        if self.stats_chart_canvas.show_cached(frame_key): return
 
-        def draw_pie(ax, data_map, title, colors=None):
-            ax.set_facecolor('#1e1e1e')
-            filtered_data = {k: v for k, v in data_map.items() if v > 0}
+        # trend charts span the whole history; the selected period is only highlighted
+        if mode in self.TREND_MODES:
+            data_key = ("trend", ledger.version)
+            compute = lambda task: AggregationEngine.from_ledger(ledger).monthly()
+        else:
+            data_key = (selected_period, ledger.version)
+            compute = lambda task: ledger.totals(selected_period)
 
-            if not filtered_data:
-                ax.text(0.5, 0.5, "No Data", ha='center', color='white', transform=ax.transAxes)
-                ax.set_title(title, color='white', fontsize=14, fontweight='bold')
-                return
-            
-            labels = list(filtered_data.keys())
-            values = list(filtered_data.values())
-            
-            wedges, texts, autotexts = ax.pie(
-                values, labels=labels, autopct='%1.1f%%', startangle=90, 
-                colors=colors, wedgeprops={'edgecolor': '#1e1e1e', 'linewidth': 2}
-            )
-            for t in texts + autotexts: t.set_color('white')
-            ax.set_title(title, color='white', fontsize=14, fontweight='bold')
+        data = self.chart_data_cache.get(data_key)
+        if data is not None:
+            self.draw_chart(frame_key, data)
+            return
+
+        def on_data(data):
+            self.chart_data_cache[data_key] = data
+            while len(self.chart_data_cache) > 32:
+                self.chart_data_cache.popitem(last=False)
+            self.draw_chart(frame_key, data)
+
+        self.chart_task = self.run_task(PROFILER.timed("chart.aggregate")(compute), on_finished=on_data)
+
+    # Reuses the figure's axes while the chart mode stays the same; only a mode
+    # switch clears the figure and builds new subplots.
+    def chart_axes(self, mode):
+        canvas = self.stats_chart_canvas
+        count = 3 if mode == "Dashboard (All Charts)" else 1
+        if canvas.layout_mode == mode and len(canvas.fig.axes) == count:
+            canvas.reset_layout()
+            return canvas.fig.axes
+        canvas.fig.clear()
+        self.bar_artists = None
+        canvas.layout_mode = mode
+        return [canvas.fig.add_subplot(1, count, i + 1) for i in range(count)]
+
+    # renders in worker processes, so the window stays responsive throughout
+    def export_reports(self):
+        if self.ledger is None or self.export_task is not None: return
+        ledger, output = self.ledger, os.path.abspath("saifu_reports")
+        self.btn_export_reports.setEnabled(False)
+        self.btn_export_reports.setText("Exporting...")
+
+        def on_exported(count):
+            QMessageBox.information(self, "Reports", f"Exported {count} periods to {output}")
+
+        def on_done():
+            self.export_task = None
+            self.btn_export_reports.setEnabled(True)
+            self.btn_export_reports.setText("Export Reports")
+
+        self.export_task = self.run_task(lambda task: export_reports(ledger, output),
+                                         on_finished=on_exported, on_done=on_done)
+
+    def setup_budget_tab(self):
+        layout = QVBoxLayout()
+
+        self.lbl_budget_month = QLabel("Budget vs Actual")
+        self.lbl_budget_month.setAlignment(Qt.AlignCenter)
+        self.lbl_budget_month.setStyleSheet("font-size: 24px; font-weight: bold; margin: 10px;")
+        layout.addWidget(self.lbl_budget_month)
+
+        self.budget_model = BudgetTableModel(self.budgets, self)
+        self.budget_model.budgets_changed.connect(self.save_budgets)
+        self.budget_table = QTableView()
+        self.budget_table.setModel(self.budget_model)
+        self.budget_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.budget_table.verticalHeader().setVisible(False)
+        self.budget_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.budget_table.verticalHeader().setDefaultSectionSize(36)
+        self.budget_table.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        layout.addWidget(self.budget_table)
+
+        hint = QLabel("Double-click a budget to set a monthly limit; it applies to every month. Leave it empty for no limit.")
+        hint.setStyleSheet("font-size: 13px; color: #aaa;")
+        layout.addWidget(hint)
+        self.budget_tab.setLayout(layout)
+
+    # reseeds the month-to-date counters; a write that lands while totals are read triggers another pass
+    def sync_budgets(self):
+        if self.ledger is None: return
+        ledger, month = self.ledger, current_month()
+
+        def seed(task):
+            version = ledger.version
+            return version, ledger.totals(month)[1]
+
+        def on_seeded(result):
+            version, expense = result
+            if ledger is not self.ledger: return
+            if version != ledger.version: return self.sync_budgets()
+            self.show_budget_alerts(self.budgets.seed(month, expense))
+            self.show_budgets()
+
+        self.run_task(seed, on_finished=on_seeded)
+
+    def show_budgets(self):
+        month = self.budgets.month
+        if month is not None:
+            title = datetime.datetime.strptime(month, "%Y-%m").strftime("%B %Y")
+            self.lbl_budget_month.setText(f"Budget vs Actual: {title} (month to date)")
+        self.budget_model.refresh()
+
+    def show_budget_alerts(self, alerts):
+        if alerts: QMessageBox.warning(self, "Budget Alert", "\n".join(alerts))
+
+    def save_budgets(self):
+        self.config["budgets"] = self.budgets.budgets()
+        save_config(self.config)
+
+    @PROFILER.timed("chart.build")
+    def draw_chart(self, frame_key, data):
+        period, mode = frame_key[:2]
+        axes = self.chart_axes(mode)
+
+        if mode in self.TREND_MODES:
+            draw_trend(axes[0], mode, period, data)
+            self.stats_chart_canvas.fig.tight_layout()
+            self.stats_chart_canvas.draw_and_cache(frame_key)
+            return
+
+        income_map, expense_map, total_inc, total_exp = data
 
         if mode == "Dashboard (All Charts)":
-            ax1 = self.stats_chart_canvas.fig.add_subplot(131)
-            ax2 = self.stats_chart_canvas.fig.add_subplot(132)
-            ax3 = self.stats_chart_canvas.fig.add_subplot(133)
+            ax1, ax2, ax3 = axes
             
             draw_pie(ax1, {"Income": total_inc, "Expense": total_exp}, "Total Overview", ['#66BB6A', '#EF5350'])
             draw_pie(ax2, income_map, "Income Breakdown")
             draw_pie(ax3, expense_map, "Expense Breakdown")
 
         elif mode == "Pie: Total Income vs Expense":
-            ax = self.stats_chart_canvas.fig.add_subplot(111)
+            ax = axes[0]
             draw_pie(ax, {"Income": total_inc, "Expense": total_exp}, "Income vs Expense", ['#66BB6A', '#EF5350'])
 
         elif mode == "Pie: Income Breakdown":
-            ax = self.stats_chart_canvas.fig.add_subplot(111)
+            ax = axes[0]
             draw_pie(ax, income_map, "Income Sources Breakdown")
 
         elif mode == "Pie: Expense Breakdown":
-            ax = self.stats_chart_canvas.fig.add_subplot(111)
+            ax = axes[0]
             draw_pie(ax, expense_map, "Expense Category Breakdown")
 
         elif mode == "Bar: Category Breakdown": 
-            ax = self.stats_chart_canvas.fig.add_subplot(111)
-            ax.set_facecolor('#1e1e1e')
-            
+            ax = axes[0]
             all_cats = sorted(list(set(list(income_map.keys()) + list(expense_map.keys()))))
-            
-            if not all_cats:
-                ax.text(0.5, 0.5, "No Data", ha='center', color='white', transform=ax.transAxes)
-                ax.set_title("Income vs Expense by Category", color='white')
-            else:
+
+            if all_cats and self.bar_artists is not None and self.bar_artists[0] == all_cats:
+                # same categories as on screen: just move the existing bars
+                _, inc_bars, exp_bars = self.bar_artists
                 inc_vals = [income_map.get(c, 0) for c in all_cats]
                 exp_vals = [expense_map.get(c, 0) for c in all_cats]
-                
-                bar_width = 0.4
-                x = range(len(all_cats))
-                
-                ax.bar([i - bar_width/2 for i in x], inc_vals, width=bar_width, label="Income", color="#66BB6A")
-                ax.bar([i + bar_width/2 for i in x], exp_vals, width=bar_width, label="Expense", color="#EF5350")
-                
-                if max(inc_vals + exp_vals) > 0:
-                    ax.set_ylim(0, max(max(inc_vals), max(exp_vals)) * 1.1)
-                else:
-                    ax.set_ylim(0, 10)
-                
-                formatter = ScalarFormatter(useOffset=False, useMathText=False)
-                formatter.set_scientific(False)
-                ax.yaxis.set_major_formatter(formatter)
-                
-                ax.set_xticks(list(x))
-                ax.set_xticklabels(all_cats, rotation=30, ha='right') 
-                ax.set_xlabel("Category", color='white')
-
-                ax.set_ylabel("Amount (₹)", color='white') 
-                
-                ax.tick_params(axis='both', which='major', colors='white', labelcolor='white')
-                
-                ax.spines['bottom'].set_color('white')
-                ax.spines['left'].set_color('white')
-                ax.spines['right'].set_color('white')
-                ax.spines['top'].set_color('white')
-                
-                ax.legend(facecolor='#333', labelcolor='white')
-                ax.grid(axis='y', linestyle='--', alpha=0.3)
-                ax.set_title("Income vs Expense by Category", color='white')
+                for bar, val in zip(inc_bars, inc_vals): bar.set_height(val)
+                for bar, val in zip(exp_bars, exp_vals): bar.set_height(val)
+                ax.set_ylim(0, max(inc_vals + exp_vals) * 1.1 or 10)
+                self.stats_chart_canvas.fig.tight_layout()
+                self.stats_chart_canvas.draw_and_cache(frame_key)
+                return
+
+            self.bar_artists = draw_category_bars(ax, income_map, expense_map)
 
         self.stats_chart_canvas.fig.tight_layout()
-        self.stats_chart_canvas.draw()
-        
+        self.stats_chart_canvas.draw_and_cache(frame_key)
+
     def delete_selected(self):
-        rows = sorted(set(idx.row() for idx in self.table.selectedIndexes()), reverse=True)
-        if not rows: return
+        rows = sorted(idx.row() for idx in self.table.selectionModel().selectedRows())
+        if not rows or self.ledger is None: return
         if QMessageBox.question(self, "Confirm", "Delete selected?") != QMessageBox.Yes: return
 
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                full_data = list(csv.reader(f))
-            
-            selected_period = self.view_month_selector.currentText()
+        deleted = [self.table_model.row(r) for r in rows]
+        self.ledger.delete([self.view_ids[r] for r in rows])
+        self.budgets.record(deleted, -1)
+        self.budget_model.refresh()
+        
+        self.populate_filter_combo_boxes()
+        self.load_transactions()
 
-            filtered_indices = []
-            for i, row in enumerate(full_data):
-                if len(row) < 5: continue
-                date_time_str = row[0] 
-                
-                match_period = (selected_period == "All Periods" or date_time_str.startswith(selected_period))
+# --- Statement Import: python "SAIFU PAY.py" --import statement.csv [...] ---
+# Streams a bank / UPI statement export into the ledger without starting the GUI.
+# Columns are recognised by their usual header names (or --column field=Header),
+# categories by keywords in the narration (saifu_config.json "import_rules" adds
+# to or replaces DEFAULT_IMPORT_RULES per category), and rows already in the
+# ledger are skipped, so importing the same statement twice is harmless.
+DEFAULT_IMPORT_RULES = {
+    "Salary": ["SALARY", "SAL CR", "PAYROLL"],
+    "Investment": ["DIVIDEND", "INTEREST", "INT.PD", "MUTUAL FUND", "REDEMPTION"],
+    "Refund": ["REFUND", "REVERSAL", "CASHBACK"],
+    "Food": ["SWIGGY", "ZOMATO", "RESTAURANT", "CAFE", "BLINKIT", "ZEPTO", "BIGBASKET"],
+    "Transport": ["UBER", "OLA CABS", "OLACABS", "RAPIDO", "IRCTC", "METRO", "PETROL", "FASTAG"],
+    "Shopping": ["AMAZON", "FLIPKART", "MYNTRA", "AJIO", "MEESHO"],
+    "Bills": ["ELECTRICITY", "BESCOM", "AIRTEL", "JIO", "BROADBAND", "RECHARGE", "INSURANCE"],
+    "Entertainment": ["NETFLIX", "SPOTIFY", "HOTSTAR", "PRIME VIDEO", "BOOKMYSHOW", "PVR"],
+    "Health": ["PHARMACY", "APOLLO", "HOSPITAL", "CLINIC", "MEDPLUS", "1MG", "PHARMEASY"],
+    "Education": ["SCHOOL", "COLLEGE", "UNIVERSITY", "COURSERA", "UDEMY", "TUITION"],
+}
 
-                if match_period:
-                    filtered_indices.append(i)
-            
-            indices_to_delete = {filtered_indices[r] for r in rows}
-            
-            new_data = [row for i, row in enumerate(full_data) if i not in indices_to_delete]
+class StatementImporter:
+    BATCH_SIZE = 10000
+    COLUMN_NAMES = {
+        "date": ("date", "txn date", "transaction date", "value date", "posting date", "tran date"),
+        "time": ("time", "txn time", "transaction time"),
+        "note": ("narration", "description", "particulars", "remarks", "details", "transaction details", "note"),
+        "debit": ("debit", "withdrawal", "withdrawal amt", "withdrawal amount", "debit amount", "dr"),
+        "credit": ("credit", "deposit", "deposit amt", "deposit amount", "credit amount", "cr"),
+        "amount": ("amount", "transaction amount", "amount (inr)", "amount(inr)"),
+        "direction": ("dr/cr", "cr/dr", "type", "transaction type", "debit/credit"),
+    }
+    DATE_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y",
+                    "%d-%m-%Y %H:%M:%S", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y", "%d-%b-%Y", "%d-%b-%y",
+                    "%d %b %Y", "%d %b %y", "%d.%m.%Y")
 
-            with open(self.data_file, 'w', newline='') as f: csv.writer(f).writerows(new_data)
-            
-            self.populate_filter_combo_boxes()
-            self.load_transactions()
+    def __init__(self, ledger, rules=None, columns=None, date_format=None):
+        self.ledger = ledger
+        self.columns = columns or {} # field -> header name, overriding COLUMN_NAMES
+        self.date_formats = (date_format,) if date_format else self.DATE_FORMATS
+        self._dates = {} # statements repeat the same few hundred dates; each is parsed once
+        rules = dict(DEFAULT_IMPORT_RULES, **(rules or {}))
+        self.matchers = {}
+        for typ, categories in (("Income", INCOME_CATEGORIES), ("Expense", EXPENSE_CATEGORIES)):
+            keywords = {k.upper(): cat for cat in categories for k in rules.get(cat, ())}
+            pattern = "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            self.matchers[typ] = (re.compile(pattern) if keywords else None, keywords, categories[-1])
+
+    @staticmethod
+    def _header_name(cell):
+        return " ".join(re.sub(r"[^a-z0-9/()]+", " ", cell.lower()).split()) # "Withdrawal Amt." -> "withdrawal amt"
+
+    def _find_header(self, reader):
+        for row in reader:
+            names = [self._header_name(cell) for cell in row]
+            fields = {}
+            for field, aliases in self.COLUMN_NAMES.items():
+                wanted = (self._header_name(self.columns[field]),) if field in self.columns else aliases
+                for alias in wanted:
+                    if alias in names:
+                        fields[field] = names.index(alias)
+                        break
+            if "date" in fields and ("amount" in fields or "debit" in fields or "credit" in fields):
+                return fields
+        return None
+
+    def parse_datetime(self, date_text, time_text=""):
+        text = " ".join((date_text.strip(), time_text.strip())).strip()
+        if text not in self._dates:
+            self._dates[text] = None
+            for fmt in self.date_formats:
+                try:
+                    self._dates[text] = datetime.datetime.strptime(text, fmt).strftime("%Y-%m-%d %H:%M:%S")
+                    break
+                except ValueError:
+                    continue
+        return self._dates[text]
+
+    @staticmethod
+    def parse_amount(text):
+        text = text.strip().upper().replace(",", "").replace("₹", "").replace("INR", "").strip()
+        negative = text.startswith("(") and text.endswith(")")
+        if negative: text = text[1:-1]
+        direction = None
+        for suffix in ("DR", "CR"):
+            if text.endswith(suffix):
+                direction, text = suffix, text[:-2].strip()
+        paise = parse_paise(text) if text else None
+        if paise is None: return None, None
+        return (-paise if negative else paise), direction
+
+    # -> [datetime, amount, category, type, note], or None for rows that are not transactions
+    def convert(self, row, fields):
+        cell = lambda field: row[fields[field]] if field in fields and fields[field] < len(row) else ""
+        when = self.parse_datetime(cell("date"), cell("time"))
+        if when is None: return None
+        debit, _ = self.parse_amount(cell("debit"))
+        credit, _ = self.parse_amount(cell("credit"))
+        if debit:
+            paise, typ = abs(debit), "Expense"
+        elif credit:
+            paise, typ = abs(credit), "Income"
+        else:
+            paise, direction = self.parse_amount(cell("amount"))
+            if not paise: return None
+            flag = cell("direction").strip().upper()
+            if flag in ("CR", "C", "CREDIT"): direction = "CR"
+            elif flag in ("DR", "D", "DEBIT"): direction = "DR"
+            typ = "Income" if (direction == "CR" or (direction is None and paise > 0)) else "Expense"
+            paise = abs(paise)
+        note = " ".join(cell("note").split())
+        matcher, keywords, fallback = self.matchers[typ]
+        match = matcher.search(note.upper()) if matcher else None
+        category = keywords[match.group(0)] if match else fallback
+        return [when, format_paise(paise if typ == "Income" else -paise), category, typ, note]
+
+    def run(self, statement_file):
+        stats = {"read": 0, "imported": 0, "duplicates": 0, "skipped": 0}
+        existing = {}
+        for key in self.ledger.transaction_keys():
+            existing[key] = existing.get(key, 0) + 1
+        batch = []
+        with open(statement_file, 'r', newline='', encoding='utf-8-sig', errors='replace') as f:
+            reader = csv.reader(f)
+            fields = self._find_header(reader)
+            if fields is None: raise ValueError(f"No date/amount header row found in {statement_file}")
+            for row in reader:
+                if not any(cell.strip() for cell in row): continue
+                stats["read"] += 1
+                record = self.convert(row, fields)
+                if record is None:
+                    stats["skipped"] += 1
+                    continue
+                # a statement row matching an existing record is a re-import; repeats within one statement are kept
+                key = transaction_key(record)
+                if existing.get(key):
+                    existing[key] -= 1
+                    stats["duplicates"] += 1
+                    continue
+                batch.append(record)
+                if len(batch) >= self.BATCH_SIZE:
+                    stats["imported"] += len(self.ledger.append_many(batch))
+                    batch = []
+        if batch: stats["imported"] += len(self.ledger.append_many(batch))
+        return stats
+
+def run_import(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="SAIFU PAY.py --import", description="Import bank / UPI statement CSVs.")
+    parser.add_argument("statements", nargs="+", help="statement CSV files")
+    parser.add_argument("--column", action="append", default=[], metavar="FIELD=HEADER",
+                        help="header to use for a field: " + ", ".join(StatementImporter.COLUMN_NAMES))
+    parser.add_argument("--date-format", help="strptime format of the date column, e.g. %%d/%%m/%%Y")
+    args = parser.parse_args([a for a in argv if a != "--import"])
+    columns = {}
+    for spec in args.column:
+        field, _, header = spec.partition("=")
+        if field not in StatementImporter.COLUMN_NAMES or not header: parser.error(f"bad --column {spec!r}")
+        columns[field] = header
+
+    config = load_config()
+    ledger = open_ledger("finance_data.csv", config)
+    importer = StatementImporter(ledger, config.get("import_rules"), columns, args.date_format)
+    try:
+        for statement in args.statements:
+            t0 = time.perf_counter()
+            try:
+                stats = importer.run(statement)
+            except (OSError, ValueError) as e:
+                print(f"{statement}: {e}", file=sys.stderr)
+                return 1
+            print(f"{statement}: imported {stats['imported']} of {stats['read']} rows "
+                  f"({stats['duplicates']} already in the ledger, {stats['skipped']} not transactions) "
+                  f"in {time.perf_counter() - t0:.1f}s")
+    finally:
+        ledger.close()
+    return 0
+
+# --- Report Export: python "SAIFU PAY.py" --export-reports [--output DIR] ---
+# Writes, for every period, a page with the dashboard pies over the category bar
+# chart (<period>.png) and a summary CSV, plus a trend page, an overview
+# summary.csv and report.pdf with every page in order. Pages are drawn on the Agg
+# backend (no QApplication) and spread over a pool of worker processes; one more
+# worker draws report.pdf's vector pages through PdfPages alongside them.
+REPORT_PAGE_SIZE = (11.69, 8.27) # A4 landscape, in inches
+REPORT_DPI = 150
+
+def report_name(period):
+    return "all_periods" if period == "All Periods" else re.sub(r"[^\w-]", "_", period)
+
+def new_report_page():
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=REPORT_PAGE_SIZE, dpi=REPORT_DPI)
+    FigureCanvasAgg(fig)
+    fig.patch.set_facecolor('#1e1e1e')
+    return fig
+
+def save_report_page(fig, path):
+    import numpy as np
+    from PIL import Image
+    fig.canvas.draw()
+    image = Image.fromarray(np.asarray(fig.canvas.buffer_rgba())[..., :3])
+    image.save(path, compress_level=1) # barely larger, several times faster than the default
+
+# One figure serves all of a worker's pages; the draw_* helpers clear the axes they reuse
+def new_period_page():
+    fig = new_report_page()
+    grid = fig.add_gridspec(2, 3, height_ratios=(1, 1.15))
+    axes = [fig.add_subplot(grid[0, i]) for i in range(3)] + [fig.add_subplot(grid[1, :])]
+    fig.subplots_adjust(left=0.07, right=0.97, top=0.9, bottom=0.13, hspace=0.35)
+    return fig, axes
+
+def draw_period_page(fig, axes, period, totals):
+    income_map, expense_map, total_inc, total_exp = totals
+    fig.suptitle(f"{period}    Income ₹{total_inc:,.2f}    Expense ₹{total_exp:,.2f}    "
+                 f"Net ₹{total_inc - total_exp:,.2f}", color='white', fontsize=16, fontweight='bold')
+    draw_pie(axes[0], {"Income": total_inc, "Expense": total_exp}, "Total Overview", ['#66BB6A', '#EF5350'])
+    draw_pie(axes[1], income_map, "Income Breakdown")
+    draw_pie(axes[2], expense_map, "Expense Breakdown")
+    draw_category_bars(axes[3], income_map, expense_map)
+
+def render_period_reports(output, jobs):
+    load_matplotlib()
+    fig, axes = new_period_page()
+    for period, totals in jobs:
+        income_map, expense_map, total_inc, total_exp = totals
+        name = report_name(period)
+        rows = [["Type", "Category", "Amount"]]
+        rows += [["Income", cat, f"{amount:.2f}"] for cat, amount in sorted(income_map.items())]
+        rows += [["Expense", cat, f"{amount:.2f}"] for cat, amount in sorted(expense_map.items())]
+        rows += [["Total", "Income", f"{total_inc:.2f}"], ["Total", "Expense", f"{total_exp:.2f}"],
+                 ["Total", "Net", f"{total_inc - total_exp:.2f}"]]
+        with open(os.path.join(output, name + ".csv"), 'wb') as f:
+            f.write(encode_csv_rows(rows))
+        draw_period_page(fig, axes, period, totals)
+        save_report_page(fig, os.path.join(output, name + ".png"))
+
+def new_trend_page(monthly):
+    fig = new_report_page()
+    fig.suptitle("Trends", color='white', fontsize=16, fontweight='bold')
+    for i, mode in enumerate(FinanceTrackerApp.TREND_MODES):
+        draw_trend(fig.add_subplot(2, 1, i + 1), mode, None, monthly)
+    fig.subplots_adjust(left=0.1, right=0.97, top=0.9, bottom=0.1, hspace=0.5)
+    return fig
+
+def render_trend_report(output, monthly):
+    load_matplotlib()
+    save_report_page(new_trend_page(monthly), os.path.join(output, "trends.png"))
+
+# the trend page, then every period's page, as vectors
+def render_report_pdf(path, jobs, monthly):
+    load_matplotlib()
+    from matplotlib.backends.backend_pdf import PdfPages
+    tmp_file = path + ".tmp"
+    with PdfPages(tmp_file) as pdf:
+        fig = new_trend_page(monthly)
+        pdf.savefig(fig, facecolor=fig.get_facecolor())
+        fig, axes = new_period_page()
+        for period, totals in jobs:
+            draw_period_page(fig, axes, period, totals)
+            pdf.savefig(fig, facecolor=fig.get_facecolor())
+    replace_file(tmp_file, path)
+
+# -> number of periods exported; workers=1 renders in this process
+@PROFILER.timed("reports.export")
+def export_reports(ledger, output, workers=None):
+    os.makedirs(output, exist_ok=True)
+    periods = ["All Periods"] + ledger.periods()
+    jobs = [(period, ledger.totals(period)) for period in periods]
+    monthly = AggregationEngine.from_ledger(ledger).monthly()
+    with open(os.path.join(output, "summary.csv"), 'wb') as f:
+        f.write(encode_csv_rows([["Period", "Income", "Expense", "Net"]] +
+                                [[p, f"{inc:.2f}", f"{exp:.2f}", f"{inc - exp:.2f}"] for p, (_, _, inc, exp) in jobs]))
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(jobs)))
+    size = -(-len(jobs) // (workers * 4)) # a few chunks per worker keeps them evenly busy
+    chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    pdf_file = os.path.join(output, "report.pdf")
+    if workers == 1:
+        render_trend_report(output, monthly)
+        for chunk in chunks:
+            render_period_reports(output, chunk)
+        render_report_pdf(pdf_file, jobs, monthly)
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        # spawn, not fork: the caller may be the GUI with Qt and worker threads running
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(render_report_pdf, pdf_file, jobs, monthly)] # the longest task, so it starts first
+            futures += [pool.submit(render_trend_report, output, monthly)]
+            futures += [pool.submit(render_period_reports, output, chunk) for chunk in chunks]
+            for future in futures:
+                future.result()
+    return len(periods)
+
+def run_export(argv):
+    import argparse
+    parser = argparse.ArgumentParser(prog="SAIFU PAY.py --export-reports",
+                                     description="Write chart pages, summary CSVs and a PDF report for every period.")
+    parser.add_argument("--output", default="saifu_reports", help="folder to write the reports to")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="rendering processes")
+    args = parser.parse_args([a for a in argv if a != "--export-reports"])
+    ledger = open_ledger("finance_data.csv", load_config())
+    try:
+        t0 = time.perf_counter()
+        count = export_reports(ledger, args.output, args.workers)
+    finally:
+        ledger.close()
+    print(f"Exported {count} periods to {os.path.abspath(args.output)} in {time.perf_counter() - t0:.1f}s")
+    return 0
+
+# --- Startup Benchmark: python "SAIFU PAY.py" --startup-benchmark ---
+def run_startup_benchmark(app):
+    timings = {"imports": time.perf_counter() - STARTUP_T0}
+
+    t0 = time.perf_counter()
+    window = FinanceTrackerApp()
+    window.show()
+    timings["construct_and_show"] = time.perf_counter() - t0
+    app.processEvents()
+    timings["first_paint"] = time.perf_counter() - STARTUP_T0
+
+    while window.ledger is None or window.active_tasks:
+        app.processEvents()
+    timings["first_table_load"] = time.perf_counter() - STARTUP_T0
+
+    t0 = time.perf_counter()
+    window.tabs.setCurrentIndex(2)
+    timings["first_stats_tab_open"] = time.perf_counter() - t0
+
+    print(json.dumps({k: round(v * 1000, 1) for k, v in timings.items()}, indent=4))
+    window.close()
+
+# --- Benchmark Suite: python "SAIFU PAY.py" --benchmark [--sizes 10000,100000] [--output FILE] ---
+# Times the window's hot paths on synthetic ledgers of growing size. Every size
+# and storage runs in its own offscreen subprocess and scratch directory, so peak
+# memory is per run; results are written as JSON and, given --baseline, compared
+# with an earlier run.
+BENCHMARK_NOTES = ["Lunch", "Groceries", "UPI-SWIGGY", "Uber ride", "Electricity bill", "Netflix", "Rent",
+                   "Pharmacy", "Books", "Movie, with \"friends\"", "Monthly salary", "Refund", ""]
+
+def write_synthetic_ledger(path, rows, seed=42):
+    rng = random.Random(seed)
+    end = datetime.datetime.now().replace(microsecond=0)
+    span = 5 * 365 * 24 * 3600 # five years of history, oldest first
+    start = end - datetime.timedelta(seconds=span)
+    with open(path, 'wb') as f:
+        batch = []
+        for i in range(rows):
+            when = start + datetime.timedelta(seconds=span * i // max(rows, 1) + rng.randrange(60))
+            income = rng.random() < 0.2
+            paise = rng.randrange(100000, 20000000) if income else rng.randrange(1000, 500000)
+            batch.append([when.strftime("%Y-%m-%d %H:%M:%S"), format_paise(paise if income else -paise),
+                          rng.choice(INCOME_CATEGORIES if income else EXPENSE_CATEGORIES),
+                          "Income" if income else "Expense",
+                          rng.choice(BENCHMARK_NOTES), str(i + 1)])
+            if len(batch) == 50000:
+                f.write(encode_csv_rows(batch))
+                batch = []
+        f.write(encode_csv_rows(batch))
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError: # not available on Windows
+        peak = peak_working_set()
+        return None if peak is None else round(peak / (1024 * 1024), 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+# Windows' peak RSS in bytes, through psutil when installed, else GetProcessMemoryInfo
+def peak_working_set():
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset
+    except (ImportError, AttributeError):
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+    except (ImportError, ValueError): # wintypes fails to load on some non-Windows builds
+        return None
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        kernel32, psapi = ctypes.WinDLL("kernel32"), ctypes.WinDLL("psapi")
+    except (AttributeError, OSError): # not Windows
+        return None
+    kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+    psapi.GetProcessMemoryInfo.argtypes = [wintypes.HANDLE, ctypes.POINTER(PROCESS_MEMORY_COUNTERS), wintypes.DWORD]
+    if not psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb): return None
+    return counters.PeakWorkingSetSize
+
+def run_benchmark_worker(rows, storage, repeat):
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    from PyQt5.QtCore import QItemSelection, QItemSelectionModel
+    QMessageBox.exec_ = lambda self: QMessageBox.Ok
+    QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+    app = QApplication([sys.argv[0]])
+
+    with open(CONFIG_FILE, 'w') as f:
+        json.dump({"storage": storage}, f)
+    write_synthetic_ledger("finance_data.csv", rows)
+    timings = {}
+
+    def wait_idle(window):
+        while window.ledger is None or window.active_tasks or window.chart_timer.isActive():
+            app.processEvents()
+
+    def measure(name, action, window, before=None):
+        samples = []
+        for _ in range(repeat):
+            if before: before()
+            t0 = time.perf_counter()
+            action()
+            wait_idle(window)
+            samples.append(time.perf_counter() - t0)
+        timings[name] = round(sorted(samples)[len(samples) // 2] * 1000, 2)
+
+    t0 = time.perf_counter()
+    window = FinanceTrackerApp()
+    window.show()
+    wait_idle(window)
+    timings["open_ledger"] = round((time.perf_counter() - t0) * 1000, 1)
+
+    def forget_periods():
+        window.periods_cache = (None, None)
+    measure("get_unique_filter_periods", window.get_unique_filter_periods, window, before=forget_periods)
+
+    window.tabs.setCurrentIndex(1)
+    wait_idle(window)
+    measure("load_transactions[All Periods]", window.load_transactions, window)
+    window.view_month_selector.setCurrentIndex(1)
+    measure("load_transactions[one month]", window.load_transactions, window)
+    window.view_month_selector.setCurrentIndex(0)
+    wait_idle(window)
+
+    window.tabs.setCurrentIndex(2)
+    wait_idle(window)
+    def forget_charts():
+        window.chart_data_cache.clear()
+        window.stats_chart_canvas.frames.clear()
+        window.stats_chart_canvas.shown_key = None
+    for i in range(window.chart_selector.count()):
+        window.chart_selector.setCurrentIndex(i)
+        wait_idle(window)
+        measure(f"generate_chart[{window.chart_selector.currentText()}]", window.render_chart, window, before=forget_charts)
+
+    window.tabs.setCurrentIndex(1)
+    wait_idle(window)
+    def select_rows():
+        model = window.table_model
+        selection = QItemSelection(model.index(0, 0), model.index(min(99, model.rowCount() - 1), 0))
+        window.table.selectionModel().select(selection, QItemSelectionModel.ClearAndSelect | QItemSelectionModel.Rows)
+    measure("delete_selected[100 rows]", window.delete_selected, window, before=select_rows)
+
+    window.close()
+    return {"rows": rows, "storage": storage, "timings_ms": timings, "peak_rss_mb": peak_rss_mb()}
+
+def run_benchmark(argv):
+    import argparse, platform, subprocess, tempfile
+    parser = argparse.ArgumentParser(prog="SAIFU PAY.py --benchmark", description="Benchmark the app on synthetic ledgers.")
+    parser.add_argument("--sizes", default="10000,100000,1000000",
+                        help="comma-separated ledger sizes in rows (up to 10000000)")
+    parser.add_argument("--storage", choices=("csv", "sqlite", "partitioned", "all"), default="all")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the median is reported")
+    parser.add_argument("--output", default="saifu_benchmark.json")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    args = parser.parse_args([a for a in argv if a != "--benchmark"])
+    sizes = [int(size) for size in args.sizes.split(",")]
+    storages = ("csv", "sqlite", "partitioned") if args.storage == "all" else (args.storage,)
+    script = os.path.abspath(__file__)
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(script),
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    report = {"commit": commit, "python": platform.python_version(), "platform": platform.platform(),
+              "created": datetime.datetime.now().isoformat(timespec="seconds"), "results": []}
+
+    for rows in sizes:
+        for storage in storages:
+            with tempfile.TemporaryDirectory(prefix="saifu-bench-") as scratch:
+                proc = subprocess.run([sys.executable, script, "--benchmark-worker", str(rows), storage, str(args.repeat)],
+                                      cwd=scratch, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{rows} rows / {storage}: failed\n{proc.stderr}", file=sys.stderr)
+                return 1
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            report["results"].append(result)
+            print(f"{rows:>9} rows  {storage:<6}  peak {result['peak_rss_mb']} MB")
+            for name, ms in result["timings_ms"].items():
+                print(f"    {name:<58} {ms:>10.1f} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=4)
+    print(f"Results written to {args.output}")
+    if args.baseline: compare_benchmarks(args.baseline, report)
+    return 0
+
+def compare_benchmarks(baseline_file, report):
+    with open(baseline_file, 'r') as f:
+        baseline = json.load(f)
+    before = {(r["rows"], r["storage"], name): ms
+              for r in baseline["results"] for name, ms in r["timings_ms"].items()}
+    print(f"Compared with {baseline_file} (commit {baseline.get('commit')}):")
+    for r in report["results"]:
+        for name, ms in r["timings_ms"].items():
+            old = before.get((r["rows"], r["storage"], name))
+            if old:
+                print(f"    {r['rows']:>9} {r['storage']:<6} {name:<58} {ms / old:>6.2f}x")
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support() # in a frozen build, a spawned report worker stops here instead of opening the app
+    if "--import" in sys.argv:
+        sys.exit(run_import(sys.argv[1:]))
+    if "--export-reports" in sys.argv:
+        sys.exit(run_export(sys.argv[1:]))
+    if "--benchmark" in sys.argv:
+        sys.exit(run_benchmark(sys.argv[1:]))
+    if "--benchmark-worker" in sys.argv:
+        rows, storage, repeat = sys.argv[sys.argv.index("--benchmark-worker") + 1:][:3]
+        print(json.dumps(run_benchmark_worker(int(rows), storage, int(repeat))))
+        sys.exit(0)
+
     if hasattr(Qt, 'AA_EnableHighDpiScaling'):
         QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     if hasattr(Qt, 'AA_UseHighDpiPixmaps'):
         QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
 
     app = QApplication(sys.argv)
+    if "--startup-benchmark" in sys.argv:
+        run_startup_benchmark(app)
+        sys.exit(0)
+    if "--profile" in sys.argv: PROFILER.start()
     window = FinanceTrackerApp()
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file